@@ -4,8 +4,8 @@ from .auth_service import AuthService
 from .jwt_handler import JWTHandler
 from .password_handler import PasswordHandler
 from .middleware import AuthMiddleware, RoleMiddleware
-from .dependencies import get_current_user, get_current_active_user, require_role, require_permission
-from .models import UserCreate, UserLogin, UserResponse, TokenResponse
+from .dependencies import get_current_user, get_current_active_user, get_auth_context, AuthContext, require_role, require_permission
+from .models import UserCreate, UserLogin, UserResponse, TokenResponse, UserRole, ROLE_BY_VALUE
 
 __all__ = [
     "AuthService",
@@ -15,10 +15,14 @@ __all__ = [
     "RoleMiddleware",
     "get_current_user",
     "get_current_active_user",
+    "get_auth_context",
+    "AuthContext",
     "require_role",
     "require_permission",
     "UserCreate",
     "UserLogin",
     "UserResponse",
     "TokenResponse",
+    "UserRole",
+    "ROLE_BY_VALUE",
 ]
\ No newline at end of file
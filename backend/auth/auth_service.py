@@ -1,17 +1,69 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, FrozenSet
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, update
 from fastapi import HTTPException, status
 from ..database.models import User, UserSession, PasswordResetToken
 from .jwt_handler import jwt_handler
-from .password_handler import password_handler
+from .password_handler import password_handler, CURRENT_HASH_VERSION
 from ..core.config import settings
+from ..utils.cache import TTLCache
 from loguru import logger
+import asyncio
 import secrets
 import hashlib
+import uuid
 
 
+# Column values of recently loaded users keyed by str(user id); shared with
+# the auth dependencies and invalidated whenever credentials or sessions
+# change here. Deactivations or role changes made elsewhere are honoured up
+# to USER_CACHE_TTL seconds late.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL)
+
+# Expiry of recently validated active sessions keyed by str(session id).
+# Logout and password changes evict their entries; other invalidations
+# take effect within SESSION_CACHE_TTL seconds.
+session_cache = TTLCache(maxsize=settings.SESSION_CACHE_MAXSIZE, ttl=settings.SESSION_CACHE_TTL)
+
+# Refreshes currently being processed, keyed by SHA-256 of the refresh
+# token. Check-and-insert happens without an await in between, so the
+# event loop's single thread makes a lock unnecessary.
+_refresh_in_flight: Dict[bytes, "asyncio.Future"] = {}
+
+# Role -> permission set, built once at import
+_PERMISSIONS_MAP: Dict[str, FrozenSet[str]] = {
+    "admin": frozenset({
+        "read:all", "write:all", "delete:all", "manage:users",
+        "manage:system", "view:analytics", "manage:threats"
+    }),
+    "security_analyst": frozenset({
+        "read:threats", "write:threats", "read:devices",
+        "view:analytics", "manage:alerts"
+    }),
+    "analyst": frozenset({
+        "read:threats", "read:devices", "view:analytics"
+    }),
+    "operator": frozenset({
+        "read:devices", "read:alerts", "write:devices"
+    }),
+    "viewer": frozenset({
+        "read:devices", "read:alerts"
+    }),
+}
+_DEFAULT_PERMISSIONS: FrozenSet[str] = frozenset({"read:basic"})
+
+
+
+async def _run_signing(func, *args):
+    """
+    Run a token-signing call, off the event loop when the algorithm is
+    asymmetric. HMAC signing is cheaper than the thread hand-off.
+    """
+    if jwt_handler.signing_is_expensive:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    return func(*args)
+
 class AuthService:
     """
     Authentication service for user management and authentication
@@ -24,7 +76,7 @@ class AuthService:
     
     async def register_user(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         email: str, 
         password: str, 
         full_name: str,
@@ -45,7 +97,9 @@ class AuthService:
         """
         try:
             # Check if user already exists
-            existing_user = db.query(User).filter(User.email == email).first()
+            existing_user = (await db.execute(
+                select(User).where(User.email == email)
+            )).scalar_one_or_none()
             if existing_user:
                 logger.warning(f"Registration attempt with existing email: {email}")
                 raise HTTPException(
@@ -66,22 +120,25 @@ class AuthService:
                 )
             
             # Hash password
-            hashed_password = password_handler.hash_password(password)
+            hashed_password = await password_handler.ahash_password(password)
             
-            # Create user
+            # Create user. Every column is populated client-side and the
+            # session does not expire on commit, so no refresh is needed.
+            now = datetime.utcnow()
             user = User(
+                id=uuid.uuid4(),
                 email=email,
                 hashed_password=hashed_password,
+                hash_version=CURRENT_HASH_VERSION,
                 full_name=full_name,
                 role=role,
                 is_active=True,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+                created_at=now,
+                updated_at=now
             )
             
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
             
             logger.info(f"User registered successfully: {email}")
             return user
@@ -90,7 +147,7 @@ class AuthService:
             raise
         except Exception as e:
             logger.error(f"Error registering user {email}: {e}")
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to register user"
@@ -98,7 +155,7 @@ class AuthService:
     
     async def authenticate_user(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         email: str, 
         password: str,
         user_agent: Optional[str] = None,
@@ -119,23 +176,25 @@ class AuthService:
         """
         try:
             # Get user
-            user = db.query(User).filter(User.email == email).first()
+            user = (await db.execute(
+                select(User).where(User.email == email)
+            )).scalar_one_or_none()
             if not user:
                 logger.warning(f"Login attempt with non-existent email: {email}")
-                await self._log_failed_attempt(db, email, ip_address, "user_not_found")
+                self._log_failed_attempt(db, email, ip_address, "user_not_found")
                 return None
             
             # Check if user is active
             if not user.is_active:
                 logger.warning(f"Login attempt with inactive user: {email}")
-                await self._log_failed_attempt(db, email, ip_address, "user_inactive")
+                self._log_failed_attempt(db, email, ip_address, "user_inactive")
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Account is disabled"
                 )
             
             # Check if user is locked out
-            if await self._is_user_locked_out(db, user.id):
+            if self._is_user_locked_out(db, user.id):
                 logger.warning(f"Login attempt with locked out user: {email}")
                 raise HTTPException(
                     status_code=status.HTTP_423_LOCKED,
@@ -143,22 +202,40 @@ class AuthService:
                 )
             
             # Verify password
-            if not password_handler.verify_password(password, user.hashed_password):
+            if not await password_handler.averify_password(
+                password, user.hashed_password, user.hash_version
+            ):
                 logger.warning(f"Failed login attempt for user: {email}")
-                await self._log_failed_attempt(db, email, ip_address, "invalid_password")
-                await self._increment_failed_attempts(db, user.id)
+                self._log_failed_attempt(db, email, ip_address, "invalid_password")
+                self._increment_failed_attempts(db, user.id)
                 return None
             
             # Reset failed attempts on successful login
-            await self._reset_failed_attempts(db, user.id)
-            
-            # Update last login
-            user.last_login = datetime.utcnow()
-            user.updated_at = datetime.utcnow()
+            self._reset_failed_attempts(db, user.id)
+            
+            # Update last login and create the session in the same
+            # transaction; both statements are flushed by the single commit
+            # below and the user row is not re-read afterwards.
+            login_time = datetime.utcnow()
+            user_values = {"last_login": login_time, "updated_at": login_time}
+            
+            # Upgrade legacy hashes while the plain password is at hand
+            if (
+                user.hash_version != CURRENT_HASH_VERSION
+                or password_handler.needs_update(user.hashed_password)
+            ):
+                user_values["hashed_password"] = await password_handler.ahash_password(password)
+                user_values["hash_version"] = CURRENT_HASH_VERSION
+            
+            await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(**user_values)
+                .execution_options(synchronize_session=False)
+            )
             
-            # Create session
-            session = await self._create_user_session(
-                db, user.id, user_agent, ip_address
+            session = self._create_user_session(
+                db, user.id, user_agent, ip_address, now=login_time
             )
             
             # Create tokens
@@ -166,41 +243,47 @@ class AuthService:
                 "sub": str(user.id),
                 "email": user.email,
                 "role": user.role,
-                "session_id": session.id,
-                "permissions": await self._get_user_permissions(user.role)
+                "session_id": str(session.id),
+                "permissions": sorted(self._get_user_permissions(user.role))
             }
             
-            tokens = jwt_handler.create_token_pair(token_data)
+            tokens = await _run_signing(jwt_handler.create_token_pair, token_data)
             
-            db.commit()
-            
-            logger.info(f"User authenticated successfully: {email}")
-            return {
+            result = {
                 "user": {
                     "id": user.id,
                     "email": user.email,
                     "full_name": user.full_name,
                     "role": user.role,
-                    "last_login": user.last_login
+                    "last_login": login_time
                 },
                 "tokens": tokens,
-                "session_id": session.id
+                "session_id": str(session.id)
             }
             
+            await db.commit()
+            user_cache.pop(str(user.id), None)
+            
+            logger.info(f"User authenticated successfully: {email}")
+            return result
+            
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Error authenticating user {email}: {e}")
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Authentication failed"
             )
     
-    async def refresh_token(self, db: Session, refresh_token: str) -> Optional[Dict[str, str]]:
+    async def refresh_token(self, db: AsyncSession, refresh_token: str) -> Optional[Dict[str, str]]:
         """
         Refresh access token using refresh token
         
+        Concurrent calls for the same refresh token share one lookup and
+        one signing operation.
+        
         Args:
             db: Database session
             refresh_token: Valid refresh token
@@ -208,6 +291,28 @@ class AuthService:
         Returns:
             New tokens or None if invalid
         """
+        flight_key = hashlib.sha256(refresh_token.encode()).digest()
+        pending = _refresh_in_flight.get(flight_key)
+        if pending is not None:
+            # shield: a cancelled follower must not cancel the leader's result
+            return await asyncio.shield(pending)
+        
+        future = asyncio.get_running_loop().create_future()
+        _refresh_in_flight[flight_key] = future
+        try:
+            result = await self._refresh_token(db, refresh_token)
+            future.set_result(result)
+            return result
+        finally:
+            _refresh_in_flight.pop(flight_key, None)
+            if not future.done():
+                # Leader was cancelled; followers fall back to "invalid"
+                future.set_result(None)
+    
+    async def _refresh_token(self, db: AsyncSession, refresh_token: str) -> Optional[Dict[str, str]]:
+        """
+        Verify a refresh token against its session and issue an access token
+        """
         try:
             # Verify refresh token
             payload = jwt_handler.verify_token(refresh_token)
@@ -218,30 +323,29 @@ class AuthService:
             # Check if session is still valid
             session_id = payload.get("session_id")
             if session_id:
-                session = db.query(UserSession).filter(
-                    and_(
-                        UserSession.id == session_id,
-                        UserSession.is_active == True,
-                        UserSession.expires_at > datetime.utcnow()
-                    )
-                ).first()
+                session = await db.get(UserSession, uuid.UUID(session_id))
                 
-                if not session:
+                # expires_at is stored as UTC; drivers differ on returning tzinfo
+                if (
+                    not session
+                    or not session.is_active
+                    or session.expires_at.replace(tzinfo=None) <= datetime.utcnow()
+                ):
                     logger.warning(f"Invalid or expired session: {session_id}")
                     return None
             
             # Get user
             user_id = payload.get("sub")
-            user = db.query(User).filter(
-                and_(User.id == user_id, User.is_active == True)
-            ).first()
+            user = await db.get(User, uuid.UUID(user_id))
             
-            if not user:
+            if not user or not user.is_active:
                 logger.warning(f"User not found or inactive: {user_id}")
                 return None
             
             # Create new access token
-            new_access_token = jwt_handler.refresh_access_token(refresh_token)
+            new_access_token = await _run_signing(
+                jwt_handler.refresh_access_token, refresh_token
+            )
             if not new_access_token:
                 return None
             
@@ -255,7 +359,7 @@ class AuthService:
             logger.error(f"Error refreshing token: {e}")
             return None
     
-    async def logout_user(self, db: Session, session_id: str) -> bool:
+    async def logout_user(self, db: AsyncSession, session_id: str) -> bool:
         """
         Logout user by invalidating session
         
@@ -267,23 +371,25 @@ class AuthService:
             True if successful, False otherwise
         """
         try:
-            session = db.query(UserSession).filter(UserSession.id == session_id).first()
+            session = await db.get(UserSession, uuid.UUID(str(session_id)))
             if session:
                 session.is_active = False
                 session.ended_at = datetime.utcnow()
-                db.commit()
+                await db.commit()
+                user_cache.pop(str(session.user_id), None)
+                session_cache.pop(str(session.id), None)
                 logger.info(f"User session ended: {session_id}")
                 return True
             return False
         except Exception as e:
             logger.error(f"Error logging out user: {e}")
-            db.rollback()
+            await db.rollback()
             return False
     
     async def change_password(
         self, 
-        db: Session, 
-        user_id: int, 
+        db: AsyncSession, 
+        user_id: uuid.UUID, 
         current_password: str, 
         new_password: str
     ) -> bool:
@@ -300,12 +406,14 @@ class AuthService:
             True if successful, False otherwise
         """
         try:
-            user = db.query(User).filter(User.id == user_id).first()
+            user = await db.get(User, user_id)
             if not user:
                 return False
             
             # Verify current password
-            if not password_handler.verify_password(current_password, user.hashed_password):
+            if not await password_handler.averify_password(
+                current_password, user.hashed_password, user.hash_version
+            ):
                 logger.warning(f"Invalid current password for user: {user.email}")
                 return False
             
@@ -322,18 +430,28 @@ class AuthService:
                 )
             
             # Hash new password
-            user.hashed_password = password_handler.hash_password(new_password)
-            user.updated_at = datetime.utcnow()
+            user.hashed_password = await password_handler.ahash_password(new_password)
+            user.hash_version = CURRENT_HASH_VERSION
+            now = datetime.utcnow()
+            user.updated_at = now
             
             # Invalidate all user sessions except current one
-            db.query(UserSession).filter(
-                and_(
+            result = await db.execute(
+                update(UserSession)
+                .where(
                     UserSession.user_id == user_id,
                     UserSession.is_active == True
                 )
-            ).update({"is_active": False, "ended_at": datetime.utcnow()})
+                .values(is_active=False, ended_at=now)
+                .returning(UserSession.id)
+                .execution_options(synchronize_session=False)
+            )
+            ended_session_ids = result.scalars().all()
             
-            db.commit()
+            await db.commit()
+            user_cache.pop(str(user_id), None)
+            for ended_session_id in ended_session_ids:
+                session_cache.pop(str(ended_session_id), None)
             logger.info(f"Password changed for user: {user.email}")
             return True
             
@@ -341,59 +459,43 @@ class AuthService:
             raise
         except Exception as e:
             logger.error(f"Error changing password for user {user_id}: {e}")
-            db.rollback()
+            await db.rollback()
             return False
     
-    async def _create_user_session(
+    def _create_user_session(
         self, 
-        db: Session, 
-        user_id: int, 
+        db: AsyncSession, 
+        user_id: uuid.UUID, 
         user_agent: Optional[str] = None,
-        ip_address: Optional[str] = None
+        ip_address: Optional[str] = None,
+        now: Optional[datetime] = None
     ) -> UserSession:
         """
         Create a new user session
         """
+        if now is None:
+            now = datetime.utcnow()
         session = UserSession(
-            id=secrets.token_urlsafe(32),
+            id=uuid.uuid4(),
+            session_token=secrets.token_urlsafe(32),
             user_id=user_id,
             user_agent=user_agent,
             ip_address=ip_address,
-            created_at=datetime.utcnow(),
-            expires_at=datetime.utcnow() + self.session_timeout,
+            created_at=now,
+            expires_at=now + self.session_timeout,
             is_active=True
         )
         
         db.add(session)
         return session
     
-    async def _get_user_permissions(self, role: str) -> List[str]:
+    def _get_user_permissions(self, role: str) -> FrozenSet[str]:
         """
         Get user permissions based on role
         """
-        permissions_map = {
-            "admin": [
-                "read:all", "write:all", "delete:all", "manage:users", 
-                "manage:system", "view:analytics", "manage:threats"
-            ],
-            "security_analyst": [
-                "read:threats", "write:threats", "read:devices", 
-                "view:analytics", "manage:alerts"
-            ],
-            "analyst": [
-                "read:threats", "read:devices", "view:analytics"
-            ],
-            "operator": [
-                "read:devices", "read:alerts", "write:devices"
-            ],
-            "viewer": [
-                "read:devices", "read:alerts"
-            ]
-        }
-        
-        return permissions_map.get(role, ["read:basic"])
+        return _PERMISSIONS_MAP.get(role, _DEFAULT_PERMISSIONS)
     
-    async def _is_user_locked_out(self, db: Session, user_id: int) -> bool:
+    def _is_user_locked_out(self, db: AsyncSession, user_id: uuid.UUID) -> bool:
         """
         Check if user is locked out due to failed attempts
         """
@@ -401,9 +503,9 @@ class AuthService:
         # For now, return False
         return False
     
-    async def _log_failed_attempt(
+    def _log_failed_attempt(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         email: str, 
         ip_address: Optional[str], 
         reason: str
@@ -413,14 +515,14 @@ class AuthService:
         """
         logger.warning(f"Failed auth attempt - Email: {email}, IP: {ip_address}, Reason: {reason}")
     
-    async def _increment_failed_attempts(self, db: Session, user_id: int):
+    def _increment_failed_attempts(self, db: AsyncSession, user_id: uuid.UUID):
         """
         Increment failed login attempts counter
         """
         # Implementation would track failed attempts
         pass
     
-    async def _reset_failed_attempts(self, db: Session, user_id: int):
+    def _reset_failed_attempts(self, db: AsyncSession, user_id: uuid.UUID):
         """
         Reset failed login attempts counter
         """
@@ -1,22 +1,86 @@
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, Union, FrozenSet, NamedTuple
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from ..database.database import get_db
+from sqlalchemy import bindparam, select, inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from ..database.database import get_async_db
 from ..database.models import User, UserSession
-from .jwt_handler import jwt_handler
-from .auth_service import auth_service
+from .jwt_handler import jwt_handler, token_fingerprint
+from .auth_service import auth_service, user_cache
+from ..core.config import settings
+from ..utils.cache import TTLCache
 from loguru import logger
 from datetime import datetime
+import hashlib
+import hmac
+import uuid
 
 
 # Security scheme
 security = HTTPBearer()
 
 
-async def get_current_user_token(
+class TokenContext(NamedTuple):
+    """Verified access-token claims plus the values derived from them"""
+    claims: dict
+    user_id: uuid.UUID
+    perms: FrozenSet[str]
+
+
+class AuthContext(NamedTuple):
+    """Everything an authorization check needs, resolved in one dependency"""
+    user: User
+    payload: dict
+    perms: FrozenSet[str]
+
+
+# Derived token contexts keyed by token fingerprint, so the subject is parsed
+# and the permission set built once per token. The verified claims shared
+# through the JWT handler's cache are never modified.
+_token_contexts = TTLCache(
+    maxsize=settings.JWT_VERIFY_CACHE_MAXSIZE,
+    ttl=settings.JWT_VERIFY_CACHE_TTL
+)
+
+# Built once at import; the engine's compiled cache is then hit on every lookup
+_ACTIVE_SESSION_BY_ID = select(UserSession).where(
+    UserSession.id == bindparam("session_id"),
+    UserSession.is_active == True,
+    UserSession.expires_at > bindparam("now"),
+)
+
+
+# SHA-256 digests of accepted API keys, compared in constant time
+_VALID_API_KEY_HASHES = tuple(
+    hashlib.sha256(key.encode()).digest() for key in settings.API_KEYS
+)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    """Fresh 401 with a Bearer challenge; instances are not shared across requests"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _invalid_token() -> HTTPException:
+    return _unauthorized("Invalid or expired token")
+
+
+def _invalid_token_type() -> HTTPException:
+    return _unauthorized("Invalid token type")
+
+
+def _invalid_user_id() -> HTTPException:
+    return _unauthorized("Invalid user ID in token")
+
+
+async def get_token_context(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> dict:
+) -> TokenContext:
     """
     Extract and verify JWT token from request
     
@@ -24,53 +88,73 @@ async def get_current_user_token(
         credentials: HTTP Bearer credentials
         
     Returns:
-        Token payload
+        Token context with claims, user ID and permission set
         
     Raises:
         HTTPException: If token is invalid or expired
     """
-    try:
-        token = credentials.credentials
-        payload = jwt_handler.verify_token(token)
-        
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Check token type
-        if payload.get("type") != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    return _verify_access_token(credentials.credentials)
+
+
+async def get_current_user_token(
+    context: TokenContext = Depends(get_token_context)
+) -> dict:
+    """
+    Extract and verify JWT token from request
+    
+    Args:
+        context: Verified token context
         
-        return payload
+    Returns:
+        Token payload
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error extracting token: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token validation failed",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    Raises:
+        HTTPException: If token is invalid or expired
+    """
+    return context.claims
+
+
+def _verify_access_token(token: str) -> TokenContext:
+    """
+    Verify an access token and derive its context
+    
+    Raises:
+        HTTPException: If token is invalid, expired or not an access token
+    """
+    payload = jwt_handler.verify_token(token)
+    
+    if not payload:
+        raise _invalid_token()
+    
+    # Check token type
+    if payload.get("type") != "access":
+        raise _invalid_token_type()
+    
+    # Only reuse a context built from this exact verified payload; a rebuild
+    # racing with another request yields an equal, immutable context
+    cache_key = token_fingerprint(token)
+    context = _token_contexts.get(cache_key)
+    if context is None or context.claims is not payload:
+        try:
+            user_id = uuid.UUID(payload["sub"])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise _invalid_user_id() from None
+        context = TokenContext(payload, user_id, frozenset(payload.get("permissions", ())))
+        _token_contexts.set(cache_key, context)
+    
+    return context
 
 
 async def get_current_user(
-    db: Session = Depends(get_db),
-    token_payload: dict = Depends(get_current_user_token)
+    db: AsyncSession = Depends(get_async_db),
+    context: TokenContext = Depends(get_token_context)
 ) -> User:
     """
     Get current authenticated user
     
     Args:
         db: Database session
-        token_payload: JWT token payload
+        context: Verified token context
         
     Returns:
         Current user object
@@ -78,36 +162,35 @@ async def get_current_user(
     Raises:
         HTTPException: If user not found or inactive
     """
-    try:
-        user_id = token_payload.get("sub")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload"
-            )
-        
-        user = db.query(User).filter(User.id == int(user_id)).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-        
-        return user
-        
-    except ValueError:
+    user = await _load_user(db, context)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user ID in token"
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting current user: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get user information"
+            detail="User not found"
         )
+    return user
+
+
+# Column attributes copied into the user cache
+_USER_COLUMNS = tuple(attr.key for attr in sa_inspect(User).column_attrs)
+
+
+async def _load_user(db: AsyncSession, context: TokenContext) -> Optional[User]:
+    """Resolve the token subject, from the user cache when possible"""
+    cache_key = context.claims["sub"]
+    snapshot = user_cache.get(cache_key)
+    if snapshot is not None:
+        # Rebuild a detached instance from the column values and attach it
+        # to this request's session without re-selecting. The cache never
+        # holds an instance bound to another request's session.
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+    
+    user = await db.get(User, context.user_id)
+    if user:
+        user_cache.set(cache_key, {key: getattr(user, key) for key in _USER_COLUMNS})
+    return user
 
 
 async def get_current_active_user(
@@ -133,8 +216,42 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_auth_context(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthContext:
+    """
+    Verify the token and load the active user in a single dependency
+    
+    Args:
+        credentials: HTTP Bearer credentials
+        db: Database session
+        
+    Returns:
+        Auth context with user, token payload and permission set
+        
+    Raises:
+        HTTPException: If token is invalid or user is missing or inactive
+    """
+    context = _verify_access_token(credentials.credentials)
+    
+    user = await _load_user(db, context)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    
+    return AuthContext(user, context.claims, context.perms)
+
+
 async def get_current_user_session(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token_payload: dict = Depends(get_current_user_token)
 ) -> Optional[UserSession]:
     """
@@ -146,88 +263,96 @@ async def get_current_user_session(
         
     Returns:
         Current user session or None
+    
+    Database errors propagate; only a malformed session ID yields None.
     """
+    session_id = token_payload.get("session_id")
+    if not session_id:
+        return None
+    
     try:
-        session_id = token_payload.get("session_id")
-        if not session_id:
-            return None
-        
-        session = db.query(UserSession).filter(
-            UserSession.id == session_id,
-            UserSession.is_active == True,
-            UserSession.expires_at > datetime.utcnow()
-        ).first()
-        
-        return session
-        
-    except Exception as e:
-        logger.error(f"Error getting user session: {e}")
+        session_id = uuid.UUID(str(session_id))
+    except ValueError:
+        logger.warning("Malformed session ID in token: {!r}", session_id)
         return None
+    
+    return (await db.execute(
+        _ACTIVE_SESSION_BY_ID,
+        {"session_id": session_id, "now": datetime.utcnow()}
+    )).scalar_one_or_none()
 
 
-def require_role(allowed_roles: List[str]) -> Callable:
+def require_role(allowed_roles: Union[str, List[str]]) -> Callable:
     """
     Dependency factory for role-based access control
     
     Args:
-        allowed_roles: List of allowed roles
+        allowed_roles: Allowed role or list of allowed roles
         
     Returns:
         Dependency function
     """
+    if isinstance(allowed_roles, str):
+        allowed_roles = [allowed_roles]
+    # Plain string values: UserRole members hash by name, not by value
+    allowed_roles = [getattr(role, "value", role) for role in allowed_roles]
+    allowed_set = frozenset(allowed_roles)
+    denied_detail = f"Access denied. Required roles: {', '.join(allowed_roles)}"
+    
     async def role_checker(
-        current_user: User = Depends(get_current_active_user)
+        auth: AuthContext = Depends(get_auth_context)
     ) -> User:
-        if current_user.role not in allowed_roles:
+        current_user = auth.user
+        if current_user.role not in allowed_set:
             logger.warning(
                 f"Access denied - User: {current_user.email}, "
                 f"Role: {current_user.role}, Required: {allowed_roles}"
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access denied. Required roles: {', '.join(allowed_roles)}"
+                detail=denied_detail
             )
         return current_user
     
     return role_checker
 
 
-def require_permission(required_permissions: List[str], require_all: bool = False) -> Callable:
+def require_permission(required_permissions: Union[str, List[str]], require_all: bool = False) -> Callable:
     """
     Dependency factory for permission-based access control
     
     Args:
-        required_permissions: List of required permissions
+        required_permissions: Required permission or list of permissions
         require_all: If True, user must have all permissions; if False, any permission
         
     Returns:
         Dependency function
     """
+    if isinstance(required_permissions, str):
+        required_permissions = [required_permissions]
+    required_set = frozenset(required_permissions)
+    denied_detail = f"Insufficient permissions. Required: {', '.join(required_permissions)}"
+    
     async def permission_checker(
-        token_payload: dict = Depends(get_current_user_token),
-        current_user: User = Depends(get_current_active_user)
+        auth: AuthContext = Depends(get_auth_context)
     ) -> User:
-        user_permissions = token_payload.get("permissions", [])
+        current_user, _, user_permissions = auth
         
         if require_all:
             # User must have ALL required permissions
-            has_permission = all(
-                perm in user_permissions for perm in required_permissions
-            )
+            has_permission = user_permissions.issuperset(required_set)
         else:
             # User must have at least ONE required permission
-            has_permission = any(
-                perm in user_permissions for perm in required_permissions
-            )
+            has_permission = not user_permissions.isdisjoint(required_set)
         
         if not has_permission:
             logger.warning(
                 f"Permission denied - User: {current_user.email}, "
-                f"Permissions: {user_permissions}, Required: {required_permissions}"
+                f"Permissions: {sorted(user_permissions)}, Required: {required_permissions}"
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Insufficient permissions. Required: {', '.join(required_permissions)}"
+                detail=denied_detail
             )
         
         return current_user
@@ -252,7 +377,7 @@ require_view_analytics = require_permission(["view:analytics", "read:all"])
 
 async def get_optional_current_user(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """
     Get current user if authenticated, otherwise return None
@@ -265,36 +390,28 @@ async def get_optional_current_user(
     Returns:
         Current user or None
     """
+    # Try to extract token
+    authorization = request.headers.get("Authorization")
+    if not authorization or authorization[:7] != "Bearer ":
+        return None
+    
+    token = authorization[7:].strip()
+    if not token:
+        return None
     try:
-        # Try to extract token
-        authorization = request.headers.get("Authorization")
-        if not authorization or not authorization.startswith("Bearer "):
-            return None
-        
-        token = authorization.split(" ")[1]
-        payload = jwt_handler.verify_token(token)
-        
-        if not payload:
-            return None
-        
-        user_id = payload.get("sub")
-        if not user_id:
-            return None
-        
-        user = db.query(User).filter(
-            User.id == int(user_id),
-            User.is_active == True
-        ).first()
-        
-        return user
-        
-    except Exception as e:
-        logger.debug(f"Optional auth failed: {e}")
+        context = _verify_access_token(token)
+    except HTTPException:
+        return None
+    
+    user = await _load_user(db, context)
+    if not user or not user.is_active:
         return None
+    
+    return user
 
 
 async def validate_session(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token_payload: dict = Depends(get_current_user_token)
 ) -> bool:
     """
@@ -310,36 +427,25 @@ async def validate_session(
     Raises:
         HTTPException: If session is invalid or expired
     """
-    try:
-        session_id = token_payload.get("session_id")
-        if not session_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="No session information in token"
-            )
-        
-        session = db.query(UserSession).filter(
-            UserSession.id == session_id,
-            UserSession.is_active == True,
-            UserSession.expires_at > datetime.utcnow()
-        ).first()
-        
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Session expired or invalid"
-            )
-        
-        return True
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error validating session: {e}")
+    session_id = token_payload.get("session_id")
+    if not session_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No session information in token"
+        )
+    
+    session = (await db.execute(
+        _ACTIVE_SESSION_BY_ID,
+        {"session_id": session_id, "now": datetime.utcnow()}
+    )).scalar_one_or_none()
+    
+    if not session:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Session validation failed"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired or invalid"
         )
+    
+    return True
 
 
 async def get_user_permissions(
@@ -359,7 +465,7 @@ async def get_user_permissions(
 
 async def check_api_key(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> bool:
     """
     Check API key for service-to-service authentication
@@ -382,10 +488,14 @@ async def check_api_key(
         )
     
     # In production, validate against database
-    # For now, check against settings
-    valid_api_keys = getattr(settings, 'API_KEYS', [])
+    # For now, check against settings. Every candidate is compared so the
+    # timing does not depend on which key (if any) matched.
+    api_key_hash = hashlib.sha256(api_key.encode()).digest()
+    is_valid = False
+    for valid_hash in _VALID_API_KEY_HASHES:
+        is_valid |= hmac.compare_digest(api_key_hash, valid_hash)
     
-    if api_key not in valid_api_keys:
+    if not is_valid:
         logger.warning(f"Invalid API key used: {api_key[:8]}...")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,10 +1,62 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+import jwt
+from jwt import ExpiredSignatureError, ImmatureSignatureError, InvalidTokenError
+from jwt.algorithms import get_default_algorithms
 from passlib.context import CryptContext
 from ..core.config import settings
+from ..utils.cache import TTLCache
 from loguru import logger
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+# (payload, exp) for successfully verified tokens keyed by token fingerprint.
+# Entries never outlive the token's "exp" claim and failures are never
+# cached. Callers share the cached dict, so they must treat it as read-only.
+_verify_cache = TTLCache(
+    maxsize=settings.JWT_VERIFY_CACHE_MAXSIZE,
+    ttl=settings.JWT_VERIFY_CACHE_TTL
+)
+
+
+# Per-deployment key for token fingerprints, derived from (not equal to)
+# the signing secret; BLAKE2b accepts at most 64 key bytes.
+_FP_KEY = hashlib.blake2b(
+    settings.JWT_SECRET_KEY.encode(), person=b"jwt-fp"
+).digest()
+
+
+def token_fingerprint(token: str) -> bytes:
+    """Keyed fixed-size cache key so raw tokens are never held as dict keys"""
+    return hashlib.blake2b(token.encode(), digest_size=16, key=_FP_KEY).digest()
+
+
+def _peek_claims(token: str) -> Dict[str, Any]:
+    """
+    Decode the claims segment without any verification; raises ValueError
+    on malformed tokens
+    """
+    _, payload_b64, _ = token.split(".", 2)
+    padded = payload_b64 + "=" * (-len(payload_b64) % 4)
+    claims = _json_loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(claims, dict):
+        raise ValueError("JWT claims segment is not an object")
+    return claims
+
 
 class JWTHandler:
     """
@@ -16,6 +68,56 @@ class JWTHandler:
         self.algorithm = settings.JWT_ALGORITHM
         self.access_token_expire_minutes = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_token_expire_days = settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
+        # Derived once; the encode/verify paths never rebuild them
+        self._algorithms = [self.algorithm]
+        self._access_ttl = self.access_token_expire_minutes * 60
+        self._refresh_ttl = self.refresh_token_expire_days * 86400
+        self._signing_key, self._verify_key = self._load_keys()
+        # Header segment exactly as PyJWT emits it for our own HS256 tokens
+        self._hs256_header = base64.urlsafe_b64encode(json.dumps(
+            {"alg": "HS256", "typ": "JWT"}, separators=(",", ":"), sort_keys=True
+        ).encode()).rstrip(b"=").decode()
+        # Keyed HMAC state (inner/outer pads already absorbed); each
+        # verification copies it instead of re-deriving the key schedule
+        self._hs256_mac = (
+            hmac.new(self._verify_key, digestmod=hashlib.sha256)
+            if self.algorithm == "HS256" else None
+        )
+    
+    def _load_keys(self):
+        """
+        Parse signing/verification keys once instead of on every call;
+        PyJWT passes already-prepared key objects straight through
+        
+        HMAC algorithms use JWT_SECRET_KEY for both. Asymmetric algorithms
+        sign with JWT_PRIVATE_KEY and verify with JWT_PUBLIC_KEY, so
+        services that only validate tokens never hold the private key.
+        """
+        algorithm = get_default_algorithms()[self.algorithm]
+        if not self.signing_is_expensive:
+            key = algorithm.prepare_key(self.secret_key)
+            return key, key
+        
+        def _pem(value: Optional[str]) -> Optional[str]:
+            return value.replace("\\n", "\n") if value else None
+        
+        private_pem = _pem(settings.JWT_PRIVATE_KEY)
+        public_pem = _pem(settings.JWT_PUBLIC_KEY)
+        signing_key = algorithm.prepare_key(private_pem) if private_pem else None
+        if public_pem:
+            verify_key = algorithm.prepare_key(public_pem)
+        elif signing_key is not None:
+            verify_key = signing_key.public_key()
+        else:
+            raise ValueError(
+                f"JWT_PUBLIC_KEY or JWT_PRIVATE_KEY is required for {self.algorithm}"
+            )
+        return signing_key, verify_key
+    
+    @property
+    def signing_is_expensive(self) -> bool:
+        """True for asymmetric algorithms, whose signatures cost milliseconds"""
+        return not self.algorithm.startswith("HS")
         
     def create_access_token(
         self, 
@@ -33,27 +135,27 @@ class JWTHandler:
             Encoded JWT token
         """
         to_encode = data.copy()
+        # Integer epoch seconds, as the JWT spec defines exp/iat
+        now = int(time.time())
         
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = now + int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(
-                minutes=self.access_token_expire_minutes
-            )
+            expire = now + self._access_ttl
             
         to_encode.update({
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "type": "access"
         })
         
         try:
             encoded_jwt = jwt.encode(
                 to_encode, 
-                self.secret_key, 
+                self._signing_key, 
                 algorithm=self.algorithm
             )
-            logger.debug(f"Access token created for user: {data.get('sub')}")
+            logger.debug("Access token created for user: {}", data.get("sub"))
             return encoded_jwt
         except Exception as e:
             logger.error(f"Error creating access token: {e}")
@@ -75,65 +177,138 @@ class JWTHandler:
             Encoded JWT refresh token
         """
         to_encode = data.copy()
+        now = int(time.time())
         
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = now + int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(
-                days=self.refresh_token_expire_days
-            )
+            expire = now + self._refresh_ttl
             
         to_encode.update({
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "type": "refresh"
         })
         
         try:
             encoded_jwt = jwt.encode(
                 to_encode, 
-                self.secret_key, 
+                self._signing_key, 
                 algorithm=self.algorithm
             )
-            logger.debug(f"Refresh token created for user: {data.get('sub')}")
+            logger.debug("Refresh token created for user: {}", data.get("sub"))
             return encoded_jwt
         except Exception as e:
             logger.error(f"Error creating refresh token: {e}")
             raise
     
-    def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
+    def verify_token(
+        self,
+        token: str,
+        _fingerprint=token_fingerprint,
+        _cache=_verify_cache,
+        _decode=jwt.decode,
+        _time=time.time
+    ) -> Optional[Dict[str, Any]]:
         """
         Verify and decode JWT token
         
+        The underscore parameters bind hot-path globals as locals; callers
+        never pass them.
+        
         Args:
             token: JWT token to verify
             
         Returns:
             Decoded token payload or None if invalid
         """
+        cache_key = _fingerprint(token)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            payload, exp = cached
+            if _time() < exp:
+                return payload
+            _cache.pop(cache_key)
+            logger.warning("Token has expired")
+            return None
+        
         try:
-            payload = jwt.decode(
-                token, 
-                self.secret_key, 
-                algorithms=[self.algorithm]
-            )
+            payload = None
+            if self.algorithm == "HS256":
+                payload = self._decode_hs256(token)
+            if payload is None:
+                # PyJWT validates exp itself and raises ExpiredSignatureError
+                payload = _decode(
+                    token, 
+                    self._verify_key, 
+                    algorithms=self._algorithms
+                )
             
-            # Check if token is expired
-            exp = payload.get("exp")
-            if exp and datetime.utcnow() > datetime.fromtimestamp(exp):
-                logger.warning("Token has expired")
-                return None
-                
-            logger.debug(f"Token verified for user: {payload.get('sub')}")
+            logger.debug("Token verified for user: {}", payload.get("sub"))
+            if "exp" in payload:
+                # Same coercion PyJWT applied when it accepted the claim
+                exp = int(payload["exp"])
+                _cache.set(cache_key, (payload, exp), ttl=exp - _time())
             return payload
             
-        except JWTError as e:
+        except ExpiredSignatureError:
+            logger.warning("Token has expired")
+            return None
+        except InvalidTokenError as e:
             logger.warning(f"JWT verification failed: {e}")
             return None
         except Exception as e:
             logger.error(f"Unexpected error verifying token: {e}")
             return None
     
+    def _decode_hs256(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Fast path for the HS256 tokens this service issues: one stdlib HMAC
+        and a constant-time compare, skipping PyJWT's generic machinery
+        
+        Returns None when the token is outside the fast path's scope (other
+        header, a payload that is not plain JSON, claims that need PyJWT's
+        validators, or exp/iat that are not plain integers) so the caller
+        falls back to PyJWT, which then decides. Raises PyJWT's exception
+        types otherwise, applying the same exp and iat checks.
+        """
+        header_b64, sep, rest = token.partition(".")
+        if header_b64 != self._hs256_header:
+            return None
+        payload_b64, sep, signature_b64 = rest.partition(".")
+        if not sep:
+            raise InvalidTokenError("Not enough segments")
+        
+        try:
+            signature = base64.urlsafe_b64decode(
+                signature_b64 + "=" * (-len(signature_b64) % 4)
+            )
+            mac = self._hs256_mac.copy()
+            mac.update(f"{header_b64}.{payload_b64}".encode())
+            expected = mac.digest()
+        except (binascii.Error, ValueError) as e:
+            raise InvalidTokenError(f"Invalid token encoding: {e}")
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidTokenError("Signature verification failed")
+        
+        try:
+            claims = _peek_claims(token)
+        except (binascii.Error, ValueError):
+            return None
+        if "nbf" in claims or "aud" in claims or "iss" in claims:
+            return None
+        # PyJWT coerces exp/iat with int(); anything but a real int (bool
+        # included) goes through it so edge cases are judged identically
+        if any(name in claims and type(claims[name]) is not int for name in ("exp", "iat")):
+            return None
+        
+        now = time.time()
+        if "exp" in claims and claims["exp"] <= now:
+            raise ExpiredSignatureError("Signature has expired")
+        if "iat" in claims and claims["iat"] > now:
+            raise ImmatureSignatureError("The token is not yet valid (iat)")
+        return claims
+    
     def get_token_payload(self, token: str) -> Optional[Dict[str, Any]]:
         """
         Get token payload without verification (for debugging)
@@ -145,11 +320,7 @@ class JWTHandler:
             Token payload or None
         """
         try:
-            payload = jwt.decode(
-                token, 
-                options={"verify_signature": False}
-            )
-            return payload
+            return _peek_claims(token)
         except Exception as e:
             logger.error(f"Error getting token payload: {e}")
             return None
@@ -172,7 +343,7 @@ class JWTHandler:
         if not exp:
             return True
             
-        return datetime.utcnow() > datetime.fromtimestamp(exp)
+        return time.time() > exp
     
     def get_token_type(self, token: str) -> Optional[str]:
         """
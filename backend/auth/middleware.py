@@ -1,17 +1,66 @@
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, FrozenSet, NamedTuple
+from contextvars import ContextVar
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
-from sqlalchemy.orm import Session
-from ..database.database import get_db
+from sqlalchemy import select
+from ..database.database import db_manager
 from ..database.models import User, UserSession
 from .jwt_handler import jwt_handler
+from .auth_service import session_cache
 from ..core.config import settings
 from loguru import logger
 from datetime import datetime
+from collections import OrderedDict, deque
+import re
+import secrets
 import time
 
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except Exception:
+    REDIS_AVAILABLE = False
+    aioredis = None
+
+
+# Sliding one-minute window, the same rule as the in-process limiter:
+# requests accepted in the last window are kept in a sorted set scored by
+# the Redis server clock (shared by all workers); rejected requests are not
+# recorded. Returns {1, 0} when accepted, else {0, ms until a slot frees}.
+_RATE_LIMIT_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, 0}
+"""
+
+# After a Redis failure the in-process limiter is used for this long before
+# Redis is tried again, so an outage costs one timeout and one log line per
+# period rather than per request
+_REDIS_RETRY_SECONDS = 30.0
+
+
+class RequestAuth(NamedTuple):
+    """Authenticated identity of the request being processed"""
+    user_id: Optional[str]
+    email: Optional[str]
+    role: Optional[str]
+    permissions: FrozenSet[str]
+    session_id: Optional[str]
+
+
+# Set by AuthMiddleware for the duration of each authenticated request
+current_auth: ContextVar[Optional[RequestAuth]] = ContextVar("current_auth", default=None)
+
 
 class AuthMiddleware(BaseHTTPMiddleware):
     """
@@ -24,6 +73,11 @@ class AuthMiddleware(BaseHTTPMiddleware):
             "/docs", "/redoc", "/openapi.json", "/health", "/metrics",
             "/auth/login", "/auth/register", "/auth/refresh", "/"
         ]
+        # One anchored alternation: a single C-level match per request
+        # instead of a startswith() call per excluded prefix
+        self._exclude_re = re.compile(
+            "^(?:" + "|".join(re.escape(path) for path in self.exclude_paths) + ")"
+        )
         self.security = HTTPBearer(auto_error=False)
     
     async def dispatch(self, request: Request, call_next):
@@ -33,7 +87,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
         start_time = time.time()
         
         # Skip authentication for excluded paths
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
+        if self._exclude_re.match(request.url.path):
             response = await call_next(request)
             return response
         
@@ -43,8 +97,13 @@ class AuthMiddleware(BaseHTTPMiddleware):
             return response
         
         try:
-            # Extract and validate token
-            token = await self._extract_token(request)
+            # Extract token: Authorization header first, cookie as fallback.
+            # Slicing avoids building a list per request as split() would.
+            authorization = request.headers.get("Authorization")
+            if authorization and authorization[:7] == "Bearer ":
+                token = authorization[7:].strip()
+            else:
+                token = request.cookies.get("access_token")
             if not token:
                 return JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,28 +120,43 @@ class AuthMiddleware(BaseHTTPMiddleware):
             
             # Validate session if present
             session_id = payload.get("session_id")
-            if session_id and not await self._validate_session(session_id):
+            if session_id:
+                # Cache hits are answered synchronously; only a miss awaits
+                session_valid = self._cached_session_valid(session_id)
+                if session_valid is None:
+                    session_valid = await self._validate_session(session_id)
+            else:
+                session_valid = True
+            if not session_valid:
                 return JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": "Session expired or invalid"}
                 )
             
-            # Add user info to request state
-            request.state.user_id = payload.get("sub")
-            request.state.user_email = payload.get("email")
-            request.state.user_role = payload.get("role")
-            request.state.user_permissions = payload.get("permissions", [])
-            request.state.session_id = session_id
+            # Publish user info for downstream middleware and dependencies
+            auth = RequestAuth(
+                user_id=payload.get("sub"),
+                email=payload.get("email"),
+                role=payload.get("role"),
+                permissions=(
+                    payload.get("_perm_set")
+                    or frozenset(payload.get("permissions") or ())
+                ),
+                session_id=session_id
+            )
+            auth_token = current_auth.set(auth)
             
             # Process request
-            response = await call_next(request)
+            try:
+                response = await call_next(request)
+            finally:
+                current_auth.reset(auth_token)
             
-            # Log request
-            process_time = time.time() - start_time
+            # Log request; loguru only formats the arguments if INFO is enabled
             logger.info(
-                f"Auth request - User: {request.state.user_email}, "
-                f"Path: {request.url.path}, Method: {request.method}, "
-                f"Time: {process_time:.3f}s"
+                "Auth request - User: {}, Path: {}, Method: {}, Time: {:.3f}s",
+                auth.email, request.url.path, request.method,
+                time.time() - start_time
             )
             
             return response
@@ -94,176 +168,235 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 content={"detail": "Authentication service error"}
             )
     
-    async def _extract_token(self, request: Request) -> Optional[str]:
+    def _cached_session_valid(self, session_id: str) -> Optional[bool]:
         """
-        Extract JWT token from request
+        Answer from the session cache, or None if the database must be asked
         """
-        # Try Authorization header first
-        authorization = request.headers.get("Authorization")
-        if authorization and authorization.startswith("Bearer "):
-            return authorization.split(" ")[1]
-        
-        # Try cookie as fallback
-        token = request.cookies.get("access_token")
-        if token:
-            return token
-        
-        return None
+        expires_at = session_cache.get(session_id)
+        if expires_at is None:
+            return None
+        return expires_at > datetime.utcnow()
     
     async def _validate_session(self, session_id: str) -> bool:
         """
-        Validate user session
+        Validate user session against the database and cache the result,
+        so it is queried at most once per session per cache TTL
         """
+        now = datetime.utcnow()
         try:
-            db = next(get_db())
-            session = db.query(UserSession).filter(
-                UserSession.id == session_id,
-                UserSession.is_active == True,
-                UserSession.expires_at > datetime.utcnow()
-            ).first()
+            async with db_manager.AsyncSessionLocal() as db:
+                expires_at = (await db.execute(
+                    select(UserSession.expires_at).where(
+                        UserSession.id == session_id,
+                        UserSession.is_active == True,
+                        UserSession.expires_at > now
+                    )
+                )).scalar_one_or_none()
+            
+            if expires_at is None:
+                return False
             
-            return session is not None
+            # Only valid sessions are cached, and never past their expiry
+            expires_at = expires_at.replace(tzinfo=None)
+            session_cache.set(
+                session_id, expires_at, ttl=(expires_at - now).total_seconds()
+            )
+            return True
         except Exception as e:
             logger.error(f"Error validating session {session_id}: {e}")
             return False
 
 
-class RoleMiddleware:
-    """
-    Role-based access control middleware
+def require(
+    roles: Optional[List[str]] = None,
+    perms: Optional[List[str]] = None,
+    all_perms: bool = False
+) -> Callable:
     """
+    Build a FastAPI dependency enforcing roles and/or permissions from the
+    authenticated request context
     
-    def __init__(self, required_roles: List[str]):
-        self.required_roles = required_roles
+    The required sets are frozen once here and captured by the returned
+    coroutine, so each check is a couple of set operations.
     
-    def __call__(self, request: Request) -> bool:
-        """
-        Check if user has required role
-        """
-        user_role = getattr(request.state, "user_role", None)
+    Args:
+        roles: Allowed roles; any one suffices
+        perms: Required permissions
+        all_perms: If True, every permission is required; otherwise any one
         
-        if not user_role:
+    Returns:
+        Dependency function
+    """
+    required_roles = frozenset(roles or ())
+    required_perms = frozenset(perms or ())
+    
+    async def dependency() -> bool:
+        auth = current_auth.get()
+        if auth is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Authentication required"
             )
         
-        if user_role not in self.required_roles:
+        if required_roles and auth.role not in required_roles:
             logger.warning(
-                f"Access denied - User role: {user_role}, "
-                f"Required: {self.required_roles}"
+                f"Access denied - User role: {auth.role}, "
+                f"Required: {sorted(required_roles)}"
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
             )
         
+        if required_perms:
+            if all_perms:
+                has_permission = required_perms <= auth.permissions
+            else:
+                has_permission = not required_perms.isdisjoint(auth.permissions)
+            if not has_permission:
+                logger.warning(
+                    f"Access denied - User permissions: {sorted(auth.permissions)}, "
+                    f"Required: {sorted(required_perms)}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Insufficient permissions"
+                )
+        
         return True
+    
+    return dependency
 
 
-class PermissionMiddleware:
+def RoleMiddleware(required_roles: List[str]) -> Callable:
     """
-    Permission-based access control middleware
+    Role-based access control dependency (kept for existing imports)
     """
-    
-    def __init__(self, required_permissions: List[str], require_all: bool = False):
-        self.required_permissions = required_permissions
-        self.require_all = require_all
-    
-    def __call__(self, request: Request) -> bool:
-        """
-        Check if user has required permissions
-        """
-        user_permissions = getattr(request.state, "user_permissions", [])
-        
-        if not user_permissions:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required"
-            )
-        
-        if self.require_all:
-            # User must have ALL required permissions
-            has_permission = all(
-                perm in user_permissions for perm in self.required_permissions
-            )
-        else:
-            # User must have at least ONE required permission
-            has_permission = any(
-                perm in user_permissions for perm in self.required_permissions
-            )
-        
-        if not has_permission:
-            logger.warning(
-                f"Access denied - User permissions: {user_permissions}, "
-                f"Required: {self.required_permissions}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Insufficient permissions"
-            )
-        
-        return True
+    return require(roles=required_roles)
+
+
+def PermissionMiddleware(required_permissions: List[str], require_all: bool = False) -> Callable:
+    """
+    Permission-based access control dependency (kept for existing imports)
+    """
+    return require(perms=required_permissions, all_perms=require_all)
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
     Rate limiting middleware
+    
+    With a Redis URL the request log lives in Redis, so limits hold across
+    workers; otherwise (or while Redis is unreachable) an in-process limiter
+    applies the same sliding one-minute window.
     """
     
-    def __init__(self, app, requests_per_minute: int = 60):
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        redis_url: Optional[str] = None,
+        max_clients: int = 100_000
+    ):
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
-        self.requests = {}  # In production, use Redis
+        self.max_clients = max_clients
+        # In-process fallback: client -> timestamps of its most recent
+        # requests, ordered least recently seen first
+        self.requests: "OrderedDict[str, deque]" = OrderedDict()
+        
+        self._redis_script = None
+        # time.time() before which Redis is not tried after a failure
+        self._redis_retry_at = 0.0
+        if redis_url and REDIS_AVAILABLE:
+            client = aioredis.from_url(
+                redis_url,
+                password=settings.REDIS_PASSWORD,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5
+            )
+            self._redis_script = client.register_script(_RATE_LIMIT_LUA)
+        elif redis_url:
+            logger.warning("redis package not installed; using in-process rate limiting")
     
     async def dispatch(self, request: Request, call_next):
         """
         Process request through rate limiting
         """
+        # Bypass rate limiting for CORS preflight requests
+        if request.method == "OPTIONS":
+            return await call_next(request)
+        
         # Get client identifier
         client_id = self._get_client_id(request)
         current_time = time.time()
         
-        # Bypass rate limiting for CORS preflight requests
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        if self._redis_script is not None and current_time >= self._redis_retry_at:
+            try:
+                allowed, retry_ms = await self._redis_script(
+                    keys=[f"rl:{client_id}"],
+                    args=[60000, self.requests_per_minute, secrets.token_hex(8)]
+                )
+            except Exception as e:
+                self._redis_retry_at = current_time + _REDIS_RETRY_SECONDS
+                logger.warning(
+                    "Redis rate limiting unavailable, using local limiter for {}s: {}",
+                    _REDIS_RETRY_SECONDS, e
+                )
+            else:
+                if self._redis_retry_at:
+                    self._redis_retry_at = 0.0
+                    logger.info("Redis rate limiting restored")
+                if not allowed:
+                    logger.warning(f"Rate limit exceeded for client: {client_id}")
+                    return self._rate_limited(max(1, -(-retry_ms // 1000)))
+                return await call_next(request)
         
         # Clean old entries
         self._cleanup_old_requests(current_time)
         
-        # Check rate limit
-        if client_id in self.requests:
-            request_times = self.requests[client_id]
-            # Count requests in the last minute
-            recent_requests = [
-                req_time for req_time in request_times 
-                if current_time - req_time < 60
-            ]
-            
-            if len(recent_requests) >= self.requests_per_minute:
-                logger.warning(f"Rate limit exceeded for client: {client_id}")
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "detail": "Rate limit exceeded",
-                        "retry_after": 60
-                    }
-                )
-            
-            # Update request times
-            self.requests[client_id] = recent_requests + [current_time]
+        # Check rate limit. Timestamps are appended in order, so entries
+        # older than the window are popped from the left in O(1) each and
+        # the deque length is the count for the last minute.
+        request_times = self.requests.get(client_id)
+        if request_times is None:
+            request_times = deque(maxlen=self.requests_per_minute)
+            self.requests[client_id] = request_times
         else:
-            self.requests[client_id] = [current_time]
+            self.requests.move_to_end(client_id)
+        
+        window_start = current_time - 60
+        while request_times and request_times[0] <= window_start:
+            request_times.popleft()
+        
+        if len(request_times) >= self.requests_per_minute:
+            logger.warning(f"Rate limit exceeded for client: {client_id}")
+            retry_after = max(1, int(request_times[0] - window_start) + 1)
+            return self._rate_limited(retry_after)
+        
+        request_times.append(current_time)
         
         response = await call_next(request)
         return response
     
+    @staticmethod
+    def _rate_limited(retry_after: int) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "detail": "Rate limit exceeded",
+                "retry_after": retry_after
+            },
+            headers={"Retry-After": str(retry_after)}
+        )
+    
     def _get_client_id(self, request: Request) -> str:
         """
         Get client identifier for rate limiting
         """
-        # Try to get user ID from request state
-        user_id = getattr(request.state, "user_id", None)
+        # Try to get user ID from the authenticated request context
+        auth = current_auth.get()
+        user_id = auth.user_id if auth else None
         if user_id:
             return f"user_{user_id}"
         
@@ -277,19 +410,20 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     
     def _cleanup_old_requests(self, current_time: float):
         """
-        Clean up old request records
+        Drop idle clients from the least recently seen end only; stops at
+        the first client that is still active, so the cost is amortised O(1)
         """
-        cutoff_time = current_time - 300  # Keep 5 minutes of history
+        cutoff_time = current_time - 60
         
-        for client_id in list(self.requests.keys()):
-            self.requests[client_id] = [
-                req_time for req_time in self.requests[client_id]
-                if req_time > cutoff_time
-            ]
-            
-            # Remove empty entries
-            if not self.requests[client_id]:
-                del self.requests[client_id]
+        while self.requests:
+            client_id, request_times = next(iter(self.requests.items()))
+            if (
+                request_times
+                and request_times[-1] > cutoff_time
+                and len(self.requests) <= self.max_clients
+            ):
+                break
+            del self.requests[client_id]
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -297,28 +431,28 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     Security headers middleware
     """
     
-    async def dispatch(self, request: Request, call_next):
-        """
-        Add security headers to response
-        """
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = (
+    # Static for the life of the process, so built once at class creation
+    _HEADERS = {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+        "Content-Security-Policy": (
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline'; "
             "style-src 'self' 'unsafe-inline'; "
             "img-src 'self' data: https:; "
             "font-src 'self' https:; "
             "connect-src 'self' ws: wss:;"
-        )
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = (
-            "geolocation=(), microphone=(), camera=()"
-        )
-        
-        return response
\ No newline at end of file
+        ),
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+    }
+    
+    async def dispatch(self, request: Request, call_next):
+        """
+        Add security headers to response
+        """
+        response = await call_next(request)
+        response.headers.update(self._HEADERS)
+        return response
@@ -1,7 +1,86 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List, Dict, Any
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field
+from typing import Annotated, Optional, List, Dict, Any, Mapping
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
+import re
+import string
+import uuid
+from ..core.config import settings
+
+
+# Validation constants, built once at import
+_NAME_RE = re.compile(r"^[a-zA-Z\s\-']+$")
+_UPPER = frozenset(string.ascii_uppercase)
+_LOWER = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIALS = frozenset('!@#$%^&*()_+-=[]{}|;:,.<>?')
+
+# OpenAPI is not served in production, so the schema examples are dropped there
+_SCHEMA_EXAMPLES = settings.ENVIRONMENT != "production"
+
+
+def _schema_extra(extra: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the schema example block, or None when docs are disabled"""
+    return extra if _SCHEMA_EXAMPLES else None
+
+
+# Example payloads shared by several models' schemas. Read-only; each
+# schema gets its own copy so edits to one cannot leak into the others.
+_USER_EXAMPLE: Mapping[str, Any] = MappingProxyType({
+    "id": "3f2b8c1e-9a4d-4e6b-8f0a-2c5d7e9b1a34",
+    "email": "analyst@company.com",
+    "full_name": "John Doe",
+    "role": "analyst",
+    "is_active": True,
+    "created_at": "2024-01-01T00:00:00Z",
+    "last_login": "2024-01-01T12:00:00Z"
+})
+
+_TOKEN_EXAMPLE: Mapping[str, Any] = MappingProxyType({
+    "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+    "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+    "token_type": "bearer",
+    "expires_in": 1800
+})
+
+
+def _validate_password_complexity(v: str) -> str:
+    """Shared password strength rule for every model accepting a new password"""
+    if len(v) < 8:
+        raise ValueError('Password must be at least 8 characters long')
+    
+    # Check for at least one uppercase, lowercase, digit, and special char
+    chars = set(v)
+    if not (chars & _UPPER and chars & _LOWER and chars & _DIGITS and chars & _SPECIALS):
+        raise ValueError(
+            'Password must contain at least one uppercase letter, '
+            'one lowercase letter, one digit, and one special character'
+        )
+    
+    return v
+
+
+def _validate_full_name(v: str) -> str:
+    """Shared full name rule: non-blank, letters, spaces, hyphens, apostrophes"""
+    if not v.strip():
+        raise ValueError('Full name cannot be empty')
+    
+    # Check for valid characters (letters, spaces, hyphens, apostrophes)
+    if not _NAME_RE.match(v):
+        raise ValueError('Full name can only contain letters, spaces, hyphens, and apostrophes')
+    
+    return v.strip()
+
+
+# Field types shared by every model, so each resolves to one core schema.
+# Validators run in pydantic-core after the length constraints, as the
+# former @validator methods did.
+Email = Annotated[EmailStr, Field(description="User email address")]
+_Password = Annotated[
+    str, Field(min_length=8, max_length=128), AfterValidator(_validate_password_complexity)
+]
+_FullName = Annotated[str, AfterValidator(_validate_full_name)]
 
 
 class UserRole(str, Enum):
@@ -13,16 +92,15 @@ class UserRole(str, Enum):
     VIEWER = "viewer"
 
 
+# Direct value -> member lookup, skipping Enum.__call__ dispatch
+ROLE_BY_VALUE: Dict[str, UserRole] = {role.value: role for role in UserRole}
+
+
 class UserCreate(BaseModel):
     """User creation model"""
-    email: EmailStr = Field(..., description="User email address")
-    password: str = Field(
-        ..., 
-        min_length=8, 
-        max_length=128,
-        description="User password (minimum 8 characters)"
-    )
-    full_name: str = Field(
+    email: Email
+    password: _Password = Field(..., description="User password (minimum 8 characters)")
+    full_name: _FullName = Field(
         ..., 
         min_length=2, 
         max_length=100,
@@ -33,89 +111,69 @@ class UserCreate(BaseModel):
         description="User role"
     )
     
-    @validator('password')
-    def validate_password(cls, v):
-        """Validate password strength"""
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        
-        # Check for at least one uppercase, lowercase, digit, and special char
-        has_upper = any(c.isupper() for c in v)
-        has_lower = any(c.islower() for c in v)
-        has_digit = any(c.isdigit() for c in v)
-        has_special = any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in v)
-        
-        if not all([has_upper, has_lower, has_digit, has_special]):
-            raise ValueError(
-                'Password must contain at least one uppercase letter, '
-                'one lowercase letter, one digit, and one special character'
-            )
-        
-        return v
-    
-    @validator('full_name')
-    def validate_full_name(cls, v):
-        """Validate full name"""
-        if not v.strip():
-            raise ValueError('Full name cannot be empty')
-        
-        # Check for valid characters (letters, spaces, hyphens, apostrophes)
-        import re
-        if not re.match(r"^[a-zA-Z\s\-']+$", v):
-            raise ValueError('Full name can only contain letters, spaces, hyphens, and apostrophes')
-        
-        return v.strip()
-    
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "email": "analyst@company.com",
                 "password": "SecurePass123!",
                 "full_name": "John Doe",
                 "role": "analyst"
             }
-        }
+        })
+    )
 
 
 class UserLogin(BaseModel):
     """User login model"""
-    email: EmailStr = Field(..., description="User email address")
+    email: Email
     password: str = Field(..., description="User password")
     remember_me: bool = Field(default=False, description="Remember login session")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "email": "analyst@company.com",
                 "password": "SecurePass123!",
                 "remember_me": False
             }
-        }
+        })
+    )
 
 
 class UserResponse(BaseModel):
     """User response model"""
-    id: int = Field(..., description="User ID")
-    email: EmailStr = Field(..., description="User email address")
+    id: uuid.UUID = Field(..., description="User ID")
+    email: Email
     full_name: str = Field(..., description="User's full name")
     role: UserRole = Field(..., description="User role")
     is_active: bool = Field(..., description="User active status")
     created_at: datetime = Field(..., description="Account creation timestamp")
     last_login: Optional[datetime] = Field(None, description="Last login timestamp")
     
-    class Config:
-        from_attributes = True
-        schema_extra = {
-            "example": {
-                "id": 1,
-                "email": "analyst@company.com",
-                "full_name": "John Doe",
-                "role": "analyst",
-                "is_active": True,
-                "created_at": "2024-01-01T00:00:00Z",
-                "last_login": "2024-01-01T12:00:00Z"
-            }
-        }
+    @classmethod
+    def from_orm_trusted(cls, obj) -> "UserResponse":
+        """
+        Build from a loaded User row without re-validating DB-constrained
+        fields; routes return its JSON in a Response so it is not validated
+        again against response_model
+        """
+        return cls.model_construct(
+            id=obj.id,
+            email=obj.email,
+            full_name=obj.full_name,
+            role=ROLE_BY_VALUE[obj.role],
+            is_active=obj.is_active,
+            created_at=obj.created_at,
+            last_login=obj.last_login
+        )
+    
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=_schema_extra({
+            "example": dict(_USER_EXAMPLE)
+        })
+    )
 
 
 class TokenResponse(BaseModel):
@@ -125,15 +183,12 @@ class TokenResponse(BaseModel):
     token_type: str = Field(default="bearer", description="Token type")
     expires_in: int = Field(..., description="Token expiration time in seconds")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                "token_type": "bearer",
-                "expires_in": 1800
-            }
-        }
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=_schema_extra({
+            "example": dict(_TOKEN_EXAMPLE)
+        })
+    )
 
 
 class LoginResponse(BaseModel):
@@ -142,134 +197,76 @@ class LoginResponse(BaseModel):
     tokens: TokenResponse = Field(..., description="Authentication tokens")
     session_id: str = Field(..., description="Session ID")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
-                "user": {
-                    "id": 1,
-                    "email": "analyst@company.com",
-                    "full_name": "John Doe",
-                    "role": "analyst",
-                    "is_active": True,
-                    "created_at": "2024-01-01T00:00:00Z",
-                    "last_login": "2024-01-01T12:00:00Z"
-                },
-                "tokens": {
-                    "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                    "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                    "token_type": "bearer",
-                    "expires_in": 1800
-                },
+                "user": dict(_USER_EXAMPLE),
+                "tokens": dict(_TOKEN_EXAMPLE),
                 "session_id": "abc123def456"
             }
-        }
+        })
+    )
 
 
 class RefreshTokenRequest(BaseModel):
     """Refresh token request model"""
     refresh_token: str = Field(..., description="JWT refresh token")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."
             }
-        }
+        })
+    )
 
 
 class ChangePasswordRequest(BaseModel):
     """Change password request model"""
     current_password: str = Field(..., description="Current password")
-    new_password: str = Field(
-        ..., 
-        min_length=8, 
-        max_length=128,
-        description="New password (minimum 8 characters)"
-    )
+    new_password: _Password = Field(..., description="New password (minimum 8 characters)")
     
-    @validator('new_password')
-    def validate_new_password(cls, v):
-        """Validate new password strength"""
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        
-        # Check for at least one uppercase, lowercase, digit, and special char
-        has_upper = any(c.isupper() for c in v)
-        has_lower = any(c.islower() for c in v)
-        has_digit = any(c.isdigit() for c in v)
-        has_special = any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in v)
-        
-        if not all([has_upper, has_lower, has_digit, has_special]):
-            raise ValueError(
-                'Password must contain at least one uppercase letter, '
-                'one lowercase letter, one digit, and one special character'
-            )
-        
-        return v
-    
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "current_password": "OldPassword123!",
                 "new_password": "NewSecurePass456@"
             }
-        }
+        })
+    )
 
 
 class PasswordResetRequest(BaseModel):
     """Password reset request model"""
-    email: EmailStr = Field(..., description="User email address")
+    email: Email
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "email": "analyst@company.com"
             }
-        }
+        })
+    )
 
 
 class PasswordResetConfirm(BaseModel):
     """Password reset confirmation model"""
     token: str = Field(..., description="Password reset token")
-    new_password: str = Field(
-        ..., 
-        min_length=8, 
-        max_length=128,
-        description="New password (minimum 8 characters)"
-    )
-    
-    @validator('new_password')
-    def validate_new_password(cls, v):
-        """Validate new password strength"""
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        
-        # Check for at least one uppercase, lowercase, digit, and special char
-        has_upper = any(c.isupper() for c in v)
-        has_lower = any(c.islower() for c in v)
-        has_digit = any(c.isdigit() for c in v)
-        has_special = any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in v)
-        
-        if not all([has_upper, has_lower, has_digit, has_special]):
-            raise ValueError(
-                'Password must contain at least one uppercase letter, '
-                'one lowercase letter, one digit, and one special character'
-            )
-        
-        return v
+    new_password: _Password = Field(..., description="New password (minimum 8 characters)")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "token": "reset_token_abc123",
                 "new_password": "NewSecurePass456@"
             }
-        }
+        })
+    )
 
 
 class UserUpdate(BaseModel):
     """User update model"""
-    full_name: Optional[str] = Field(
+    full_name: Optional[_FullName] = Field(
         None, 
         min_length=2, 
         max_length=100,
@@ -278,54 +275,58 @@ class UserUpdate(BaseModel):
     role: Optional[UserRole] = Field(None, description="User role")
     is_active: Optional[bool] = Field(None, description="User active status")
     
-    @validator('full_name')
-    def validate_full_name(cls, v):
-        """Validate full name"""
-        if v is not None:
-            if not v.strip():
-                raise ValueError('Full name cannot be empty')
-            
-            # Check for valid characters
-            import re
-            if not re.match(r"^[a-zA-Z\s\-']+$", v):
-                raise ValueError('Full name can only contain letters, spaces, hyphens, and apostrophes')
-            
-            return v.strip()
-        return v
-    
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "full_name": "John Smith",
                 "role": "security_analyst",
                 "is_active": True
             }
-        }
+        })
+    )
 
 
 class SessionResponse(BaseModel):
     """User session response model"""
-    id: str = Field(..., description="Session ID")
-    user_id: int = Field(..., description="User ID")
+    id: uuid.UUID = Field(..., description="Session ID")
+    user_id: uuid.UUID = Field(..., description="User ID")
     user_agent: Optional[str] = Field(None, description="User agent string")
     ip_address: Optional[str] = Field(None, description="IP address")
     created_at: datetime = Field(..., description="Session creation timestamp")
     expires_at: datetime = Field(..., description="Session expiration timestamp")
     is_active: bool = Field(..., description="Session active status")
     
-    class Config:
-        from_attributes = True
-        schema_extra = {
+    @classmethod
+    def from_orm_trusted(cls, obj) -> "SessionResponse":
+        """
+        Build from a loaded UserSession row without re-validating; routes
+        return its JSON in a Response so it is not validated again
+        """
+        return cls.model_construct(
+            id=obj.id,
+            user_id=obj.user_id,
+            user_agent=obj.user_agent,
+            ip_address=obj.ip_address,
+            created_at=obj.created_at,
+            expires_at=obj.expires_at,
+            is_active=obj.is_active
+        )
+    
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=_schema_extra({
             "example": {
-                "id": "session_abc123def456",
-                "user_id": 1,
+                "id": "b7e4a2d9-1c3f-4a8e-9d6b-5f0c2e7a4b18",
+                "user_id": "3f2b8c1e-9a4d-4e6b-8f0a-2c5d7e9b1a34",
                 "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
                 "ip_address": "192.168.1.100",
                 "created_at": "2024-01-01T12:00:00Z",
                 "expires_at": "2024-01-02T12:00:00Z",
                 "is_active": True
             }
-        }
+        })
+    )
 
 
 class PermissionResponse(BaseModel):
@@ -333,8 +334,8 @@ class PermissionResponse(BaseModel):
     permissions: List[str] = Field(..., description="List of user permissions")
     role: UserRole = Field(..., description="User role")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "permissions": [
                     "read:threats",
@@ -343,7 +344,8 @@ class PermissionResponse(BaseModel):
                 ],
                 "role": "analyst"
             }
-        }
+        })
+    )
 
 
 class APIResponse(BaseModel):
@@ -352,11 +354,12 @@ class APIResponse(BaseModel):
     message: str = Field(..., description="Response message")
     data: Optional[Dict[str, Any]] = Field(None, description="Response data")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra=_schema_extra({
             "example": {
                 "success": True,
                 "message": "Operation completed successfully",
                 "data": {}
             }
-        }
\ No newline at end of file
+        })
+    )
\ No newline at end of file
@@ -1,11 +1,64 @@
 from passlib.context import CryptContext
 from passlib.hash import bcrypt
-from typing import Optional
+from typing import Optional, List, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import hashlib
+import hmac
+import os
+import re
 import secrets
 import string
 from ..core.config import settings
+from ..utils.cache import TTLCache
 from loguru import logger
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except Exception:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+
+# Stored alongside each hash (User.hash_version)
+HASH_VERSION_LEGACY = 1   # bcrypt(password)
+HASH_VERSION_SHA256 = 2   # bcrypt(hex(sha256(password)))
+CURRENT_HASH_VERSION = HASH_VERSION_SHA256
+
+# Checked once: loguru builds a record for every call even when filtered out
+_DEBUG = settings.LOG_LEVEL.upper() == "DEBUG"
+
+_SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+_LOWER = frozenset(string.ascii_lowercase)
+_UPPER = frozenset(string.ascii_uppercase)
+_DIGITS = frozenset(string.digits)
+_SPECIALS = frozenset(_SPECIAL_CHARS)
+_COMMON_PATTERNS = (
+    "123456", "password", "qwerty", "abc123",
+    "admin", "letmein", "welcome", "monkey"
+)
+
+# Blocklist matcher built once: a single pass over the password finds any
+# pattern, independent of how many patterns there are
+if AHOCORASICK_AVAILABLE:
+    _COMMON_AC = ahocorasick.Automaton()
+    for _pattern in _COMMON_PATTERNS:
+        _COMMON_AC.add_word(_pattern, _pattern)
+    _COMMON_AC.make_automaton()
+    
+    def _find_common_pattern(password_lower: str) -> Optional[str]:
+        for _, pattern in _COMMON_AC.iter(password_lower):
+            return pattern
+        return None
+else:
+    _COMMON_RE = re.compile("|".join(map(re.escape, _COMMON_PATTERNS)))
+    
+    def _find_common_pattern(password_lower: str) -> Optional[str]:
+        match = _COMMON_RE.search(password_lower)
+        return match.group(0) if match else None
+
 
 class PasswordHandler:
     """
@@ -19,40 +72,90 @@ class PasswordHandler:
             deprecated="auto",
             bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS
         )
+        # Resolved once: verification skips the context's scheme dispatch
+        self._hasher = self.pwd_context.handler()
+        # Recent verification outcomes keyed by a keyed digest of
+        # (hash version, stored hash, presented password). The stored hash
+        # acts as the epoch: a password change changes the key, so stale
+        # results are never served. Plain passwords are never stored.
+        self._verify_cache = TTLCache(
+            maxsize=10_000, ttl=settings.PASSWORD_VERIFY_CACHE_TTL
+        )
+        self._verify_cache_key = secrets.token_bytes(32)
+        # Memoized per full hash string: passlib also inspects the salt and
+        # padding, so the ident/cost prefix alone is not enough. Exceptions
+        # are not cached.
+        self._needs_update = lru_cache(maxsize=10_000)(self.pwd_context.needs_update)
+        # bcrypt releases the GIL, so threads give real parallelism here
+        self._pool = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            thread_name_prefix="bcrypt"
+        )
         
+    @staticmethod
+    def _prehash(password: str) -> str:
+        """
+        Reduce a password to a fixed 64-character hex digest, so bcrypt never
+        truncates at 72 bytes or stops at an embedded NUL
+        """
+        return hashlib.sha256(password.encode("utf-8")).hexdigest()
+    
     def hash_password(self, password: str) -> str:
         """
-        Hash a password using bcrypt
+        Hash a password using bcrypt over its SHA-256 pre-hash
         
         Args:
             password: Plain text password
             
         Returns:
-            Hashed password
+            Hashed password (version CURRENT_HASH_VERSION)
         """
         try:
-            hashed = self.pwd_context.hash(password)
-            logger.debug("Password hashed successfully")
+            hashed = self.pwd_context.hash(self._prehash(password))
+            if _DEBUG:
+                logger.debug("Password hashed successfully")
             return hashed
         except Exception as e:
             logger.error(f"Error hashing password: {e}")
             raise
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    def verify_password(
+        self,
+        plain_password: str,
+        hashed_password: str,
+        hash_version: int = CURRENT_HASH_VERSION
+    ) -> bool:
         """
         Verify a password against its hash
         
         Args:
             plain_password: Plain text password
             hashed_password: Hashed password from database
+            hash_version: Scheme the stored hash was produced with
             
         Returns:
             True if password matches, False otherwise
         """
+        cache_key = None
+        if self._verify_cache.ttl > 0:
+            cache_key = hmac.new(
+                self._verify_cache_key,
+                f"{hash_version}\0{hashed_password}\0{plain_password}".encode(),
+                hashlib.sha256
+            ).digest()
+            cached = self._verify_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            is_valid = self.pwd_context.verify(plain_password, hashed_password)
+            if hash_version >= HASH_VERSION_SHA256:
+                plain_password = self._prehash(plain_password)
+            is_valid = self._hasher.verify(plain_password, hashed_password)
+            if cache_key is not None:
+                self._verify_cache.set(cache_key, is_valid)
             if is_valid:
-                logger.debug("Password verification successful")
+                if _DEBUG:
+                    logger.debug("Password verification successful")
             else:
                 logger.warning("Password verification failed")
             return is_valid
@@ -60,6 +163,39 @@ class PasswordHandler:
             logger.error(f"Error verifying password: {e}")
             return False
     
+    async def ahash_password(self, password: str) -> str:
+        """
+        Hash a password on the bcrypt thread pool without blocking the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.hash_password, password)
+    
+    async def averify_password(
+        self,
+        plain_password: str,
+        hashed_password: str,
+        hash_version: int = CURRENT_HASH_VERSION
+    ) -> bool:
+        """
+        Verify a password on the bcrypt thread pool without blocking the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, self.verify_password, plain_password, hashed_password, hash_version
+        )
+    
+    def verify_many(self, pairs: Sequence[Tuple]) -> List[bool]:
+        """
+        Verify several passwords in parallel on the bcrypt thread pool
+        
+        Args:
+            pairs: (plain_password, hashed_password[, hash_version]) tuples
+            
+        Returns:
+            Verification results in input order
+        """
+        return list(self._pool.map(lambda pair: self.verify_password(*pair), pairs))
+    
     def needs_update(self, hashed_password: str) -> bool:
         """
         Check if password hash needs to be updated
@@ -71,7 +207,7 @@ class PasswordHandler:
             True if hash needs update, False otherwise
         """
         try:
-            return self.pwd_context.needs_update(hashed_password)
+            return self._needs_update(hashed_password)
         except Exception as e:
             logger.error(f"Error checking if password needs update: {e}")
             return False
@@ -110,7 +246,7 @@ class PasswordHandler:
         if include_numbers:
             characters += string.digits
         if include_symbols:
-            characters += "!@#$%^&*()_+-=[]{}|;:,.<>?"
+            characters += _SPECIAL_CHARS
         
         if not characters:
             # Fallback to alphanumeric if no character sets selected
@@ -118,13 +254,31 @@ class PasswordHandler:
             logger.warning("No character sets selected, using alphanumeric")
         
         try:
-            password = ''.join(secrets.choice(characters) for _ in range(length))
-            logger.debug(f"Generated password of length {length}")
+            password = self._random_string(characters, length)
+            if _DEBUG:
+                logger.debug("Generated password of length {}", length)
             return password
         except Exception as e:
             logger.error(f"Error generating password: {e}")
             raise
     
+    @staticmethod
+    def _random_string(characters: str, length: int) -> str:
+        """
+        Draw length characters uniformly from characters using bulk random
+        bytes, rejecting values above the largest multiple of the alphabet size
+        """
+        n = len(characters)
+        limit = 256 - (256 % n)
+        out: List[str] = []
+        while len(out) < length:
+            for b in secrets.token_bytes((length - len(out)) * 2):
+                if b < limit:
+                    out.append(characters[b % n])
+                    if len(out) == length:
+                        break
+        return ''.join(out)
+    
     def validate_password_strength(self, password: str) -> dict:
         """
         Validate password strength
@@ -149,51 +303,46 @@ class PasswordHandler:
         else:
             result["score"] += 1
         
+        # One pass over the password; class checks are set intersections
+        chars = set(password)
+        
         # Check for lowercase letters
-        if not any(c.islower() for c in password):
+        if chars.isdisjoint(_LOWER):
             result["issues"].append("Password should contain lowercase letters")
             result["suggestions"].append("Add lowercase letters (a-z)")
         else:
             result["score"] += 1
         
         # Check for uppercase letters
-        if not any(c.isupper() for c in password):
+        if chars.isdisjoint(_UPPER):
             result["issues"].append("Password should contain uppercase letters")
             result["suggestions"].append("Add uppercase letters (A-Z)")
         else:
             result["score"] += 1
         
         # Check for numbers
-        if not any(c.isdigit() for c in password):
+        if chars.isdisjoint(_DIGITS):
             result["issues"].append("Password should contain numbers")
             result["suggestions"].append("Add numbers (0-9)")
         else:
             result["score"] += 1
         
         # Check for special characters
-        special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-        if not any(c in special_chars for c in password):
+        if chars.isdisjoint(_SPECIALS):
             result["issues"].append("Password should contain special characters")
             result["suggestions"].append("Add special characters (!@#$%^&*)")
         else:
             result["score"] += 1
         
         # Check for common patterns
-        common_patterns = [
-            "123456", "password", "qwerty", "abc123", 
-            "admin", "letmein", "welcome", "monkey"
-        ]
-        
-        password_lower = password.lower()
-        for pattern in common_patterns:
-            if pattern in password_lower:
-                result["is_valid"] = False
-                result["issues"].append(f"Password contains common pattern: {pattern}")
-                result["suggestions"].append("Avoid common words and patterns")
-                break
+        pattern = _find_common_pattern(password.lower())
+        if pattern is not None:
+            result["is_valid"] = False
+            result["issues"].append(f"Password contains common pattern: {pattern}")
+            result["suggestions"].append("Avoid common words and patterns")
         
         # Check for repeated characters
-        if len(set(password)) < len(password) * 0.6:
+        if len(chars) < len(password) * 0.6:
             result["issues"].append("Password has too many repeated characters")
             result["suggestions"].append("Use more diverse characters")
         
@@ -208,7 +357,8 @@ class PasswordHandler:
             result["strength"] = "Very Weak"
             result["is_valid"] = False
         
-        logger.debug(f"Password strength validation: {result['strength']}")
+        if _DEBUG:
+            logger.debug("Password strength validation: {}", result["strength"])
         return result
     
     def generate_reset_token(self, length: int = 32) -> str:
@@ -223,7 +373,8 @@ class PasswordHandler:
         """
         try:
             token = secrets.token_urlsafe(length)
-            logger.debug("Password reset token generated")
+            if _DEBUG:
+                logger.debug("Password reset token generated")
             return token
         except Exception as e:
             logger.error(f"Error generating reset token: {e}")
@@ -1,15 +1,262 @@
 import asyncio
-from typing import AsyncGenerator, Optional
+import hashlib
+import time
+import warnings
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
 from contextlib import asynccontextmanager
 
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event, text, inspect as sa_inspect, Enum as SAEnum
+from sqlalchemy.engine import Connection, Dialect, Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from loguru import logger
 
 from ..core.config import settings
-from .models import Base, create_tables
+from ..utils.cache import TTLCache
+from .models import (
+    Base, User, create_tables, PARTITIONED_TABLES, PARTITIONED_PARENTS_SQL,
+    PARTITION_CHILDREN_SQL, MATERIALIZED_VIEWS, partition_statements, expired_partitions
+)
+
+
+# Server-side TCP keepalives: connections silently dropped by a NAT or
+# firewall are detected in ~1 minute instead of failing at checkout
+_KEEPALIVE_SETTINGS = {
+    "tcp_keepalives_idle": "30",
+    "tcp_keepalives_interval": "10",
+    "tcp_keepalives_count": "3",
+}
+
+
+_CREATE_MIGRATIONS_TABLE_SQL = text("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        id SERIAL PRIMARY KEY,
+        version VARCHAR(255) NOT NULL UNIQUE,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+""")
+
+_RECORD_MIGRATION_SQL = text("""
+    INSERT INTO schema_migrations (version) VALUES (:version)
+    ON CONFLICT (version) DO NOTHING
+""")
+
+# A migration step runs against a sync Connection inside the migration's
+# transaction
+MigrationStep = Callable[[Connection], None]
+
+
+def _add_column(table: str, column: str, ddl: str) -> MigrationStep:
+    """Migration step adding a column unless the table already has it"""
+    def step(conn: Connection):
+        existing = {c["name"] for c in sa_inspect(conn).get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def _raw_packet_bytes(conn: Connection):
+    """network_packets.raw_packet_hex (hex text) -> raw_packet_bytes (bytea)"""
+    existing = {c["name"] for c in sa_inspect(conn).get_columns("network_packets")}
+    if "raw_packet_hex" not in existing:
+        return
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            "ALTER TABLE network_packets ALTER COLUMN raw_packet_hex "
+            "TYPE bytea USING decode(raw_packet_hex, 'hex')"
+        ))
+    conn.execute(text(
+        "ALTER TABLE network_packets RENAME COLUMN raw_packet_hex TO raw_packet_bytes"
+    ))
+
+
+def _server_defaults(conn: Connection):
+    """
+    Install the models' server-side defaults on existing PostgreSQL tables.
+    SQLite cannot change a column default without rebuilding the table.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    inspector = sa_inspect(conn)
+    quote = conn.dialect.identifier_preparer.quote
+    compiler = conn.dialect.ddl_compiler(conn.dialect, None)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for column in table.columns:
+            if column.server_default is None:
+                continue
+            conn.execute(text(
+                f"ALTER TABLE {quote(table.name)} ALTER COLUMN {quote(column.name)} "
+                f"SET DEFAULT {compiler.get_column_default_string(column)}"
+            ))
+
+
+def _native_enums(conn: Connection):
+    """
+    Convert VARCHAR enum columns to the models' native PostgreSQL ENUM types.
+    Values outside the enum (matched case-insensitively) become OTHER where
+    the enum has it, otherwise the column's default.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    inspector = sa_inspect(conn)
+    quote = conn.dialect.identifier_preparer.quote
+    # A view over the converted columns blocks ALTER COLUMN TYPE; the next
+    # create_all recreates it
+    conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_threat_summary"))
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for column in table.columns:
+            enum_type = column.type
+            if not isinstance(enum_type, SAEnum) or not enum_type.native_enum:
+                continue
+            enum_type.create(conn, checkfirst=True)
+            
+            values = list(enum_type.enums)
+            if "OTHER" in values:
+                fallback = "'OTHER'"
+            elif column.default is not None and not column.default.is_callable:
+                fallback = f"'{getattr(column.default.arg, 'value', column.default.arg)}'"
+            else:
+                fallback = "NULL"
+            name = quote(column.name)
+            allowed = ", ".join(f"'{value}'" for value in values)
+            conn.execute(text(
+                f"ALTER TABLE {quote(table.name)} ALTER COLUMN {name} "
+                f"TYPE {quote(enum_type.name)} USING (CASE "
+                f"WHEN upper({name}::text) IN ({allowed}) THEN upper({name}::text) "
+                f"ELSE {fallback} END)::{quote(enum_type.name)}"
+            ))
+
+
+def _create_missing_indexes(conn: Connection):
+    """Create model indexes that existing tables do not have yet"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            # checkfirst skips existing indexes; ddl_if() conditions apply
+            index.create(conn, checkfirst=True)
+
+
+# Ordered changes for databases created from an earlier version of the
+# models; create_all only adds missing tables and never alters existing
+# ones. A fresh database already matches the models, so every version is
+# recorded as applied when it is bootstrapped.
+SCHEMA_MIGRATIONS: List[Tuple[str, List[MigrationStep]]] = [
+    ("0001_users_hash_version", [
+        # Existing hashes are plain bcrypt (version 1)
+        _add_column("users", "hash_version", "INTEGER NOT NULL DEFAULT 1"),
+    ]),
+    ("0002_user_sessions_ended_at", [
+        _add_column("user_sessions", "ended_at", "TIMESTAMP WITH TIME ZONE"),
+    ]),
+    ("0003_network_packets_raw_bytes", [_raw_packet_bytes]),
+    ("0004_server_defaults", [_server_defaults]),
+    ("0005_native_enums", [_native_enums]),
+]
+
+_bootstrap_versions: Dict[str, str] = {}
+
+
+def _bootstrap_version(dialect: Dialect) -> str:
+    """
+    Marker recorded in schema_migrations once create_all has run for the
+    current schema: a hash of the compiled table and index DDL, the DDL
+    event listeners and the migration list. Any model change produces a new
+    marker, so the next start bootstraps again; otherwise create_all is
+    skipped entirely.
+    """
+    version = _bootstrap_versions.get(dialect.name)
+    if version is not None:
+        return version
+    
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            parts.append(str(CreateIndex(index).compile(dialect=dialect)))
+        parts.extend(_listener_names(table))
+    parts.extend(_listener_names(Base.metadata))
+    parts.extend(v for v, _ in SCHEMA_MIGRATIONS)
+    
+    version = "schema_bootstrap:" + hashlib.sha1("\n".join(parts).encode()).hexdigest()
+    _bootstrap_versions[dialect.name] = version
+    return version
+
+
+def _listener_names(target) -> List[str]:
+    """DDL statements, or function names, of target's create/drop listeners"""
+    names = []
+    for listeners in (target.dispatch.before_create, target.dispatch.after_create,
+                      target.dispatch.before_drop, target.dispatch.after_drop):
+        for fn in listeners:
+            names.append(getattr(fn, "statement", None) or getattr(fn, "__qualname__", ""))
+    return names
+
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    """Engine keyword arguments for url, taken from the DB_* settings"""
+    if not is_async:
+        # The sync engine only serves startup work and occasional sync
+        # callers; a persistent pool would just hold idle server connections
+        options = {
+            "poolclass": NullPool,
+            "echo": settings.DATABASE_ECHO,
+            "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+            "insertmanyvalues_page_size": 1000,
+        }
+        if url.startswith("postgresql"):
+            # psycopg2 fast execution helpers for UPDATE/DELETE executemany too
+            options["executemany_mode"] = "values_plus_batch"
+        return options
+    
+    options = {
+        # PgBouncer hands out server connections per transaction, so a
+        # checkout ping only adds a round-trip there
+        "pool_pre_ping": settings.DB_POOL_PRE_PING and not settings.DB_PGBOUNCER_MODE,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "echo": settings.DATABASE_ECHO,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        # Multi-row INSERT ... VALUES for executemany, 1000 rows per statement
+        "insertmanyvalues_page_size": 1000,
+    }
+    if not url.startswith("sqlite"):
+        options["pool_size"] = settings.DB_POOL_SIZE
+        options["max_overflow"] = settings.DB_MAX_OVERFLOW
+        options["pool_timeout"] = settings.DB_POOL_TIMEOUT
+    if "+asyncpg" in url:
+        if settings.DB_PGBOUNCER_MODE:
+            # Prepared statements do not survive transaction pooling
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "server_settings": {"jit": "off"},
+            }
+        else:
+            options["connect_args"] = {
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": 256,
+                "server_settings": _KEEPALIVE_SETTINGS,
+            }
+    return options
+
+
+@event.listens_for(Engine, "connect")
+def _configure_sync_connection(dbapi_connection, connection_record):
+    """Set per-connection options on the sync drivers (registered once, at import)"""
+    driver = type(dbapi_connection).__module__
+    if driver.startswith("sqlite3"):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    elif driver.startswith("psycopg2"):
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute("SET search_path TO public")
+
 
 class DatabaseManager:
     """Database manager for handling connections and sessions"""
@@ -24,64 +271,8 @@ class DatabaseManager:
     async def initialize(self):
         """Initialize database connections"""
         try:
-            url = settings.DATABASE_URL
-
-            # Determine sync and async URLs based on backend
-            if 'postgresql' in url:
-                sync_url = url
-                async_url = url.replace('postgresql://', 'postgresql+asyncpg://')
-            elif 'sqlite' in url:
-                # Ensure async driver for sqlite
-                sync_url = url.replace('sqlite+aiosqlite://', 'sqlite://')
-                async_url = url if 'aiosqlite' in url else url.replace('sqlite://', 'sqlite+aiosqlite://')
-            else:
-                sync_url = url
-                async_url = url
-            
-            # Create synchronous engine
-            self.engine = create_engine(
-                sync_url,
-                pool_pre_ping=True,
-                pool_recycle=300,
-                echo=settings.DATABASE_ECHO
-            )
-            
-            # Create asynchronous engine
-            self.async_engine = create_async_engine(
-                async_url,
-                pool_pre_ping=True,
-                pool_recycle=300,
-                echo=settings.DATABASE_ECHO
-            )
-            
-            # Set up connection event handlers
-            @event.listens_for(self.engine, "connect", once=True)
-            def set_sqlite_pragma(dbapi_connection, connection_record):
-                """Set SQLite pragmas if using SQLite"""
-                if self.engine.dialect.name == 'sqlite':
-                    cursor = dbapi_connection.cursor()
-                    cursor.execute("PRAGMA foreign_keys=ON")
-                    cursor.close()
-
-            @event.listens_for(self.engine, "connect")
-            def set_postgresql_search_path(dbapi_connection, connection_record):
-                """Set PostgreSQL search path"""
-                if self.engine.dialect.name == 'postgresql':
-                    with dbapi_connection.cursor() as cursor:
-                        cursor.execute("SET search_path TO public")
-            
-            # Create session factories
-            self.SessionLocal = sessionmaker(
-                autocommit=False,
-                autoflush=False,
-                bind=self.engine
-            )
-            
-            self.AsyncSessionLocal = async_sessionmaker(
-                self.async_engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
+            # Create engines and session factories
+            self._create_engines(settings.sync_url, settings.async_url)
             
             # Create tables
             await self._create_tables()
@@ -93,7 +284,7 @@ class DatabaseManager:
             logger.info("Database initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize database with URL {settings.DATABASE_URL}: {e}")
+            logger.error(f"Failed to initialize database with URL {settings.sanitized_url}: {e}")
             # Try fallback to SQLite in development if primary DB is unavailable
             try:
                 if settings.ENVIRONMENT != 'production':
@@ -101,29 +292,7 @@ class DatabaseManager:
                     fallback_url_sync = fallback_url_async.replace('sqlite+aiosqlite://', 'sqlite://')
                     logger.warning("Falling back to local SQLite database file 'ics_local.db' for development")
                     # Recreate engines with fallback
-                    self.engine = create_engine(
-                        fallback_url_sync,
-                        pool_pre_ping=True,
-                        pool_recycle=300,
-                        echo=settings.DATABASE_ECHO
-                    )
-                    self.async_engine = create_async_engine(
-                        fallback_url_async,
-                        pool_pre_ping=True,
-                        pool_recycle=300,
-                        echo=settings.DATABASE_ECHO
-                    )
-                    # Session factories
-                    self.SessionLocal = sessionmaker(
-                        autocommit=False,
-                        autoflush=False,
-                        bind=self.engine
-                    )
-                    self.AsyncSessionLocal = async_sessionmaker(
-                        self.async_engine,
-                        class_=AsyncSession,
-                        expire_on_commit=False
-                    )
+                    self._create_engines(fallback_url_sync, fallback_url_async)
                     # Create tables and test
                     await self._create_tables()
                     await self._test_connection()
@@ -135,11 +304,60 @@ class DatabaseManager:
             # Fallback not applicable or failed, re-raise original error
             raise
     
+    def _create_engines(self, sync_url: str, async_url: str):
+        """Create the engines and session factories; sync only if enabled"""
+        # The sync pool would otherwise hold idle connections that count
+        # against the server's max_connections
+        self.engine = None
+        self.SessionLocal = None
+        if settings.DATABASE_SYNC_ENABLED:
+            self.engine = create_engine(sync_url, **_engine_options(sync_url))
+            self.SessionLocal = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=self.engine,
+                expire_on_commit=False
+            )
+        
+        self.async_engine = create_async_engine(
+            async_url, **_engine_options(async_url, is_async=True)
+        )
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+    
     async def _create_tables(self):
-        """Create database tables if they don't exist"""
+        """Create missing tables and migrate tables from older models"""
         try:
-            # Use synchronous engine for table creation
-            create_tables(self.engine)
+            async with self.async_engine.begin() as conn:
+                await conn.execute(_CREATE_MIGRATIONS_TABLE_SQL)
+                result = await conn.execute(text("SELECT version FROM schema_migrations"))
+                applied = set(result.scalars().all())
+                has_schema = await conn.run_sync(
+                    lambda sync_conn: sa_inspect(sync_conn).has_table(User.__tablename__)
+                )
+            
+            if has_schema:
+                for version, steps in SCHEMA_MIGRATIONS:
+                    if version not in applied:
+                        await MigrationManager.apply_migration(version, steps)
+            
+            bootstrap_version = _bootstrap_version(self.async_engine.dialect)
+            if bootstrap_version in applied:
+                logger.info("Database tables already bootstrapped")
+                return
+            
+            async with self.async_engine.begin() as conn:
+                await conn.run_sync(create_tables)
+                if has_schema:
+                    # create_all only indexes the tables it creates
+                    await conn.run_sync(_create_missing_indexes)
+                await conn.execute(_RECORD_MIGRATION_SQL, [
+                    {"version": version}
+                    for version in [v for v, _ in SCHEMA_MIGRATIONS] + [bootstrap_version]
+                ])
             logger.info("Database tables created/verified")
         except Exception as e:
             logger.error(f"Failed to create tables: {e}")
@@ -147,14 +365,21 @@ class DatabaseManager:
     
     async def _test_connection(self):
         """Test database connection"""
-        try:
-            # Test synchronous connection
+        def probe_sync():
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
-            
-            # Test asynchronous connection
-            async with self.async_engine.begin() as conn:
+        
+        async def probe_async():
+            async with self.async_engine.connect() as conn:
                 await conn.execute(text("SELECT 1"))
+        
+        try:
+            # The probes are independent, so the sync one runs in a worker
+            # thread alongside the async one
+            probes = [probe_async()]
+            if self.engine is not None:
+                probes.append(asyncio.to_thread(probe_sync))
+            await asyncio.gather(*probes)
             
             logger.info("Database connection test successful")
             
@@ -166,14 +391,10 @@ class DatabaseManager:
         """Get synchronous database session"""
         if not self._initialized:
             raise RuntimeError("Database not initialized")
+        if self.SessionLocal is None:
+            raise RuntimeError("Sync database access is disabled (DATABASE_SYNC_ENABLED)")
         return self.SessionLocal()
     
-    async def get_async_session(self) -> AsyncSession:
-        """Get asynchronous database session"""
-        if not self._initialized:
-            raise RuntimeError("Database not initialized")
-        return self.AsyncSessionLocal()
-    
     @asynccontextmanager
     async def session_scope(self):
         """Provide a transactional scope around a series of operations"""
@@ -198,6 +419,12 @@ class DatabaseManager:
                 await session.rollback()
                 raise
     
+    @asynccontextmanager
+    async def async_readonly_scope(self):
+        """Provide an async session for reads only; nothing is committed"""
+        async with self.AsyncSessionLocal() as session:
+            yield session
+    
     async def close(self):
         """Close database connections"""
         try:
@@ -214,7 +441,17 @@ db_manager = DatabaseManager()
 
 # Dependency functions for FastAPI
 def get_db() -> Session:
-    """Dependency function to get database session"""
+    """
+    Dependency function to get a sync database session
+    
+    Deprecated: FastAPI runs sync dependencies in its threadpool, so every
+    request pays a thread hop. Use get_async_db. Requires DATABASE_SYNC_ENABLED.
+    """
+    warnings.warn(
+        "get_db is deprecated; use get_async_db",
+        DeprecationWarning,
+        stacklevel=2
+    )
     db = db_manager.get_session()
     try:
         yield db
@@ -236,129 +473,292 @@ async def close_database():
     """Close database connections on shutdown"""
     await db_manager.close()
 
+async def run_database_maintenance():
+    """
+    Periodic PostgreSQL upkeep: create the coming months' partitions before
+    rows for them land in the default partition, drop partitions older
+    than DB_PARTITION_RETENTION_DAYS (0 keeps everything) and refresh the
+    materialized views
+    """
+    if db_manager.async_engine.dialect.name != "postgresql":
+        return
+    
+    tables = {"tables": list(PARTITIONED_TABLES)}
+    async with db_manager.async_session_scope() as session:
+        result = await session.execute(PARTITIONED_PARENTS_SQL, tables)
+        for statement in partition_statements(result.scalars().all()):
+            await session.execute(text(statement))
+        
+        if settings.DB_PARTITION_RETENTION_DAYS > 0:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=settings.DB_PARTITION_RETENTION_DAYS)
+            result = await session.execute(PARTITION_CHILDREN_SQL, tables)
+            for name in expired_partitions(result.scalars().all(), cutoff):
+                await session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                logger.info(f"Dropped expired partition {name}")
+    
+    # CONCURRENTLY keeps the views readable during the refresh
+    for view in MATERIALIZED_VIEWS:
+        async with db_manager.async_session_scope() as session:
+            await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+
+async def database_maintenance_loop():
+    """Run database maintenance every DB_MAINTENANCE_INTERVAL seconds"""
+    while True:
+        try:
+            await run_database_maintenance()
+        except Exception as e:
+            logger.error(f"Database maintenance failed: {e}")
+        await asyncio.sleep(settings.DB_MAINTENANCE_INTERVAL)
+
+# Last healthy probe result, reused for DB_HEALTH_CACHE_TTL seconds so
+# frequent load-balancer polls do not each take a pooled connection
+_health_cache = {"ts": 0.0, "value": None}
+
 # Database health check
 async def check_database_health() -> dict:
     """Check database health status"""
+    now = time.monotonic()
+    if _health_cache["value"] is not None and now - _health_cache["ts"] < settings.DB_HEALTH_CACHE_TTL:
+        return _health_cache["value"]
+    
     try:
-        # Test synchronous connection
-        with db_manager.engine.connect() as conn:
-            result = conn.execute(text("SELECT 1 as health_check"))
-            sync_status = "healthy" if result.fetchone() else "unhealthy"
-        
-        # Test asynchronous connection
-        async with db_manager.async_engine.begin() as conn:
+        # The async engine serves all requests, so it is the one probed
+        async with db_manager.async_engine.connect() as conn:
             result = await conn.execute(text("SELECT 1 as health_check"))
-            async_status = "healthy" if await result.fetchone() else "unhealthy"
+            async_status = "healthy" if result.fetchone() else "unhealthy"
         
-        return {
-            "database": "healthy",
-            "sync_connection": sync_status,
+        health = {
+            "database": "healthy" if async_status == "healthy" else "unhealthy",
             "async_connection": async_status,
-            "url": settings.DATABASE_URL.split('@')[1] if '@' in settings.DATABASE_URL else "hidden"
+            "url": settings.sanitized_url
         }
+        if async_status == "healthy":
+            _health_cache["ts"] = now
+            _health_cache["value"] = health
+        return health
     
     except Exception as e:
+        _health_cache["value"] = None
         logger.error(f"Database health check failed: {e}")
         return {
             "database": "unhealthy",
             "error": str(e)
         }
 
+# Results of rarely-changing reads (table columns, applied migrations).
+# Applying a migration clears it, since either can change.
+_read_cache = TTLCache(maxsize=128, ttl=60)
+
+# Tables the maintenance helpers may touch; names are interpolated into
+# SQL and command lines, so only these are accepted
+_MAINTENANCE_TABLES = frozenset({
+    'network_events', 'threat_detections', 'audit_logs', 
+    'ml_predictions', 'system_metrics'
+})
+
+# Introspection queries, compiled once
+_TABLE_INFO_SQL = text("""
+    SELECT 
+        column_name,
+        data_type,
+        is_nullable,
+        column_default
+    FROM information_schema.columns 
+    WHERE table_name = :table_name
+    ORDER BY ordinal_position
+""")
+
+_DATABASE_STATS_SQL = text("""
+    SELECT 
+        schemaname,
+        relname as tablename,
+        n_tup_ins as inserts,
+        n_tup_upd as updates,
+        n_tup_del as deletes,
+        n_live_tup as live_tuples,
+        n_dead_tup as dead_tuples
+    FROM pg_stat_user_tables
+    ORDER BY n_live_tup DESC
+""")
+
 # Database utilities
 class DatabaseUtils:
     """Utility functions for database operations"""
     
+    @staticmethod
+    async def execute_batch(
+        queries: Sequence[Tuple[Union[str, TextClause], Optional[dict]]],
+        readonly: bool = True
+    ) -> List[list]:
+        """
+        Run several queries in one session and transaction
+        
+        Statements run back to back on the session's single connection
+        (a connection cannot run them concurrently); the saving is one
+        checkout instead of one per query. Read-only batches skip the commit.
+        """
+        scope = db_manager.async_readonly_scope if readonly else db_manager.async_session_scope
+        async with scope() as session:
+            rows = []
+            for query, params in queries:
+                if isinstance(query, str):
+                    query = text(query)
+                result = await session.execute(query, params or {})
+                rows.append(result.fetchall())
+            return rows
+    
     @staticmethod
     async def execute_raw_query(query: str, params: dict = None):
         """Execute raw SQL query"""
         try:
-            async with db_manager.async_session_scope() as session:
-                result = await session.execute(query, params or {})
-                return result.fetchall()
+            readonly = isinstance(query, str) and query.lstrip()[:6].upper() == "SELECT"
+            (rows,) = await DatabaseUtils.execute_batch([(query, params)], readonly=readonly)
+            return rows
         except Exception as e:
             logger.error(f"Failed to execute raw query: {e}")
             raise
     
+    @staticmethod
+    async def execute_raw_fast(query: str, *args) -> list:
+        """
+        Execute raw SQL directly on the asyncpg connection
+        
+        Skips SQLAlchemy's result processing and returns asyncpg Records.
+        The query uses asyncpg's positional $1, $2, ... placeholders.
+        """
+        if db_manager.async_engine.dialect.driver != "asyncpg":
+            raise RuntimeError("execute_raw_fast requires the asyncpg driver")
+        
+        try:
+            async with db_manager.async_engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                return await raw.driver_connection.fetch(query, *args)
+        except Exception as e:
+            logger.error(f"Failed to execute raw query: {e}")
+            raise
+    
+    @staticmethod
+    async def stream_raw_query(
+        query: Union[str, TextClause],
+        params: dict = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Any]:
+        """
+        Execute a raw SQL query, yielding rows as they arrive
+        
+        Uses a server-side cursor, so memory is bounded by batch_size rows
+        rather than the whole result set.
+        """
+        if isinstance(query, str):
+            query = text(query)
+        async with db_manager.AsyncSessionLocal() as session:
+            result = await session.stream(
+                query.execution_options(yield_per=batch_size), params or {}
+            )
+            async for row in result:
+                yield row
+    
+    @staticmethod
+    def stream_database_stats(batch_size: int = 1000) -> AsyncIterator[Any]:
+        """Database statistics, streamed row by row"""
+        return DatabaseUtils.stream_raw_query(_DATABASE_STATS_SQL, batch_size=batch_size)
+    
     @staticmethod
     async def get_table_info(table_name: str):
         """Get information about a specific table"""
+        cache_key = ("table_info", table_name)
+        rows = _read_cache.get(cache_key)
+        if rows is not None:
+            return rows
+        
         try:
-            query = """
-            SELECT 
-                column_name,
-                data_type,
-                is_nullable,
-                column_default
-            FROM information_schema.columns 
-            WHERE table_name = :table_name
-            ORDER BY ordinal_position;
-            """
-            
-            async with db_manager.async_session_scope() as session:
-                result = await session.execute(query, {"table_name": table_name})
-                return result.fetchall()
+            (rows,) = await DatabaseUtils.execute_batch(
+                [(_TABLE_INFO_SQL, {"table_name": table_name})]
+            )
+            _read_cache.set(cache_key, rows)
+            return rows
                 
         except Exception as e:
             logger.error(f"Failed to get table info for {table_name}: {e}")
             raise
     
+    @staticmethod
+    async def get_tables_overview(table_names: Sequence[str]) -> Dict[str, list]:
+        """Column info for several tables plus database stats, in one round of queries"""
+        try:
+            queries = [(_TABLE_INFO_SQL, {"table_name": name}) for name in table_names]
+            queries.append((_DATABASE_STATS_SQL, None))
+            *infos, stats = await DatabaseUtils.execute_batch(queries)
+            return {
+                "tables": dict(zip(table_names, infos)),
+                "stats": stats
+            }
+                
+        except Exception as e:
+            logger.error(f"Failed to get tables overview: {e}")
+            raise
+    
     @staticmethod
     async def get_database_stats():
         """Get database statistics"""
         try:
-            stats_query = """
-            SELECT 
-                schemaname,
-                tablename,
-                n_tup_ins as inserts,
-                n_tup_upd as updates,
-                n_tup_del as deletes,
-                n_live_tup as live_tuples,
-                n_dead_tup as dead_tuples
-            FROM pg_stat_user_tables
-            ORDER BY n_live_tup DESC;
-            """
-            
-            async with db_manager.async_session_scope() as session:
-                result = await session.execute(stats_query)
-                return result.fetchall()
+            (rows,) = await DatabaseUtils.execute_batch([(_DATABASE_STATS_SQL, None)])
+            return rows
                 
         except Exception as e:
             logger.error(f"Failed to get database stats: {e}")
             return []
     
     @staticmethod
-    async def cleanup_old_records(table_name: str, date_column: str, days_old: int = 30):
-        """Clean up old records from a table"""
+    async def cleanup_old_records(
+        table_name: str,
+        date_column: str,
+        days_old: int = 30,
+        batch_size: int = 10000
+    ):
+        """
+        Clean up old records from a table
+        
+        Rows are deleted in batches of batch_size, each in its own
+        transaction, so a large purge never holds long row locks.
+        """
         try:
             # Validate table and column names to prevent SQL injection
-            allowed_tables = {
-                'network_events', 'threat_detections', 'audit_logs', 
-                'ml_predictions', 'system_metrics'
-            }
             allowed_columns = {
                 'created_at', 'timestamp', 'detected_at', 'logged_at'
             }
             
-            if table_name not in allowed_tables:
+            if table_name not in _MAINTENANCE_TABLES:
                 raise ValueError(f"Invalid table name: {table_name}")
             if date_column not in allowed_columns:
                 raise ValueError(f"Invalid date column: {date_column}")
             if not isinstance(days_old, int) or days_old < 1 or days_old > 365:
                 raise ValueError(f"Invalid days_old value: {days_old}")
             
-            # Use text() with bound parameters to prevent SQL injection
-            from sqlalchemy import text
+            # Use text() with bound parameters to prevent SQL injection.
+            # make_interval takes a typed integer, so the cutoff is a plain
+            # timestamp expression the planner can use for an index range scan.
+            # ctid is only unique within one partition, hence the tableoid.
             cleanup_query = text(f"""
-                DELETE FROM {table_name} 
-                WHERE {date_column} < NOW() - INTERVAL :days_interval
+                DELETE FROM {table_name}
+                WHERE (tableoid, ctid) IN (
+                    SELECT tableoid, ctid FROM {table_name}
+                    WHERE {date_column} < NOW() - make_interval(days => :days)
+                    LIMIT :batch_size
+                )
             """)
+            params = {"days": days_old, "batch_size": batch_size}
             
-            async with db_manager.async_session_scope() as session:
-                result = await session.execute(cleanup_query, {"days_interval": f"{days_old} days"})
-                deleted_count = result.rowcount
-                logger.info(f"Cleaned up {deleted_count} old records from {table_name}")
-                return deleted_count
+            deleted_count = 0
+            while True:
+                async with db_manager.async_session_scope() as session:
+                    result = await session.execute(cleanup_query, params)
+                deleted_count += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+            
+            logger.info(f"Cleaned up {deleted_count} old records from {table_name}")
+            return deleted_count
                 
         except Exception as e:
             logger.error(f"Failed to cleanup old records from {table_name}: {e}")
@@ -367,36 +767,45 @@ class DatabaseUtils:
     @staticmethod
     async def backup_table(table_name: str, backup_path: str):
         """Create a backup of a specific table"""
+        if table_name not in _MAINTENANCE_TABLES:
+            logger.error(f"Refusing to back up unknown table: {table_name}")
+            return False
+        
+        proc = None
         try:
-            import subprocess
-            import os
-            
             # Extract database connection details
             db_url = settings.DATABASE_URL
             # This is a simplified backup - in production, use proper backup tools
             
-            backup_command = [
+            # Run pg_dump without blocking the event loop
+            proc = await asyncio.create_subprocess_exec(
                 "pg_dump",
                 "-t", table_name,
                 "-f", backup_path,
-                db_url
-            ]
-            
-            result = subprocess.run(backup_command, capture_output=True, text=True)
+                db_url,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await asyncio.wait_for(
+                proc.communicate(), timeout=settings.DB_BACKUP_TIMEOUT
+            )
             
-            if result.returncode == 0:
+            if proc.returncode == 0:
                 logger.info(f"Table {table_name} backed up to {backup_path}")
                 return True
             else:
-                logger.error(f"Backup failed: {result.stderr}")
+                logger.error(f"Backup failed: {stderr.decode(errors='replace')}")
                 return False
                 
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logger.error(f"Backup of {table_name} timed out after {settings.DB_BACKUP_TIMEOUT}s")
+            return False
         except Exception as e:
             logger.error(f"Failed to backup table {table_name}: {e}")
             return False
 
-# Connection event handlers will be set up during initialization
-
 # Database migration utilities
 class MigrationManager:
     """Handle database migrations"""
@@ -405,16 +814,8 @@ class MigrationManager:
     async def create_migration_table():
         """Create migration tracking table"""
         try:
-            create_table_query = """
-            CREATE TABLE IF NOT EXISTS schema_migrations (
-                id SERIAL PRIMARY KEY,
-                version VARCHAR(255) NOT NULL UNIQUE,
-                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-            
             async with db_manager.async_session_scope() as session:
-                await session.execute(create_table_query)
+                await session.execute(_CREATE_MIGRATIONS_TABLE_SQL)
                 logger.info("Migration table created/verified")
                 
         except Exception as e:
@@ -422,26 +823,34 @@ class MigrationManager:
             raise
     
     @staticmethod
-    async def apply_migration(version: str, migration_sql: str):
-        """Apply a database migration"""
+    async def apply_migration(version: str, migration: Union[str, Sequence[MigrationStep]]):
+        """Apply a database migration given as SQL or as a list of steps"""
         try:
-            # Check if migration already applied
-            check_query = "SELECT version FROM schema_migrations WHERE version = :version"
+            # Record first: the unique version both checks for a previous
+            # apply and claims the migration against concurrent deployers.
+            # The apply runs in the same transaction, so a failure undoes both.
+            record_query = text("""
+                INSERT INTO schema_migrations (version) VALUES (:version)
+                ON CONFLICT (version) DO NOTHING
+                RETURNING version
+            """)
             
             async with db_manager.async_session_scope() as session:
-                result = await session.execute(check_query, {"version": version})
-                if result.fetchone():
+                result = await session.execute(record_query, {"version": version})
+                if result.fetchone() is None:
                     logger.info(f"Migration {version} already applied")
                     return
                 
                 # Apply migration
-                await session.execute(migration_sql)
-                
-                # Record migration
-                record_query = "INSERT INTO schema_migrations (version) VALUES (:version)"
-                await session.execute(record_query, {"version": version})
+                if isinstance(migration, str):
+                    await session.execute(text(migration))
+                else:
+                    for step in migration:
+                        await session.run_sync(lambda s, step=step: step(s.connection()))
                 
                 logger.info(f"Migration {version} applied successfully")
+            
+            _read_cache.clear()
                 
         except Exception as e:
             logger.error(f"Failed to apply migration {version}: {e}")
@@ -450,12 +859,18 @@ class MigrationManager:
     @staticmethod
     async def get_applied_migrations():
         """Get list of applied migrations"""
+        rows = _read_cache.get(("applied_migrations",))
+        if rows is not None:
+            return rows
+        
         try:
-            query = "SELECT version, applied_at FROM schema_migrations ORDER BY applied_at"
+            query = text("SELECT version, applied_at FROM schema_migrations ORDER BY applied_at")
             
-            async with db_manager.async_session_scope() as session:
+            async with db_manager.async_readonly_scope() as session:
                 result = await session.execute(query)
-                return result.fetchall()
+                rows = result.fetchall()
+            _read_cache.set(("applied_migrations",), rows)
+            return rows
                 
         except Exception as e:
             logger.error(f"Failed to get applied migrations: {e}")
@@ -468,6 +883,7 @@ __all__ = [
     'get_async_db',
     'init_database',
     'close_database',
+    'database_maintenance_loop',
     'check_database_health',
     'DatabaseUtils',
     'MigrationManager'
@@ -1,18 +1,25 @@
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 from enum import Enum
+import csv
+import io
+import json
 
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Float, Boolean, Text, JSON,
-    ForeignKey, Index, UniqueConstraint, CheckConstraint
+    Column, Integer, String, DateTime, Float, Boolean, Text, JSON, LargeBinary,
+    ForeignKey, Index, UniqueConstraint, CheckConstraint, insert,
+    DDL, event, text, func, Enum as SAEnum
 )
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, Session
+from sqlalchemy.orm import relationship, Session, joinedload, selectinload
 import uuid
 
 # SQLite compatibility overrides for PostgreSQL-specific types
 from sqlalchemy.types import TypeDecorator, CHAR
 from sqlalchemy import JSON as SA_JSON
+from sqlalchemy.dialects import postgresql
 from ..core.config import settings
 
 # Provide cross-backend compatible type aliases unconditionally
@@ -41,10 +48,65 @@ class GUID(TypeDecorator):
 def UUID(**kwargs):
     return GUID()
 
-INET = String(45)
-JSONB = SA_JSON
+class _new_uuid(FunctionElement):
+    """Server-side random UUID, rendered per dialect for column defaults"""
+    type = GUID()
+    inherit_cache = True
+
+@compiles(_new_uuid)
+def _new_uuid_default(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+@compiles(_new_uuid, "postgresql")
+def _new_uuid_postgresql(element, compiler, **kw):
+    return "gen_random_uuid()::text"
+
+@compiles(_new_uuid, "sqlite")
+def _new_uuid_sqlite(element, compiler, **kw):
+    # Version 4 UUID text assembled from randomblob()
+    return (
+        "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || "
+        "substr(hex(randomblob(2)), 2) || '-' || "
+        "substr('89ab', 1 + (abs(random()) % 4), 1) || "
+        "substr(hex(randomblob(2)), 2) || '-' || hex(randomblob(6)))"
+    )
 
-Base = declarative_base()
+INET = String(45)
+# Real JSONB on PostgreSQL (indexable with GIN), plain JSON elsewhere
+JSONB = SA_JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def _gin_index(name: str, column: str) -> Index:
+    """
+    GIN index for JSONB containment (@>) lookups, PostgreSQL only. The
+    jsonb_path_ops opclass is smaller and faster than the default but
+    serves containment queries only.
+    """
+    return Index(
+        name, column,
+        postgresql_using="gin",
+        postgresql_ops={column: "jsonb_path_ops"}
+    ).ddl_if(dialect="postgresql")
+
+def _pg_enum(enum_cls, name: str) -> SAEnum:
+    """
+    Native ENUM type on PostgreSQL (4 bytes per row, validated server-side),
+    a VARCHAR sized to the longest value elsewhere
+    """
+    return SAEnum(enum_cls, name=name, native_enum=True)
+
+class _ModelBase:
+    # Server-generated defaults come back with the INSERT/UPDATE (RETURNING)
+    # instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+Base = declarative_base(cls=_ModelBase)
+
+# gen_random_uuid() is built in from PostgreSQL 13; older servers get it
+# from pgcrypto
+event.listen(Base.metadata, "before_create", DDL(
+    "CREATE EXTENSION IF NOT EXISTS pgcrypto"
+).execute_if(dialect="postgresql"))
 
 class ThreatSeverity(str, Enum):
     """Threat severity levels"""
@@ -94,19 +156,25 @@ class ProtocolType(str, Enum):
     DNP3 = "DNP3"
     OTHER = "OTHER"
 
+# Shared by two columns, so the type is created once
+PROTOCOL_TYPE_ENUM = _pg_enum(ProtocolType, 'protocol_type_enum')
+
 class User(Base):
     """User model for authentication and authorization"""
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
+    # 1 = bcrypt(password), 2 = bcrypt(hex(sha256(password))). Rows that
+    # predate the column are legacy; new hashes are always pre-hashed.
+    hash_version = Column(Integer, default=2, server_default="1", nullable=False)
     full_name = Column(String(100), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     last_login = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
@@ -121,19 +189,25 @@ class UserSession(Base):
     """User session model for tracking active sessions"""
     __tablename__ = "user_sessions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     session_token = Column(String(255), unique=True, nullable=False, index=True)
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
-    last_accessed = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    last_accessed = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    ended_at = Column(DateTime(timezone=True), nullable=True)
     ip_address = Column(String(45), nullable=True)  # IPv6 compatible
     user_agent = Column(Text, nullable=True)
     
     # Relationships
     user = relationship("User", backref="sessions")
     
+    # Indexes
+    __table_args__ = (
+        Index('idx_session_user_active', 'user_id', 'is_active'),
+    )
+    
     def __repr__(self):
         return f"<UserSession(user_id='{self.user_id}', active='{self.is_active}')>"
 
@@ -142,11 +216,11 @@ class PasswordResetToken(Base):
     """Password reset token model"""
     __tablename__ = "password_reset_tokens"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     token = Column(String(255), unique=True, nullable=False, index=True)
     is_used = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     
     # Relationships
@@ -160,9 +234,9 @@ class Device(Base):
     """Industrial device model"""
     __tablename__ = "devices"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     name = Column(String(100), nullable=False)
-    device_type = Column(String(50), nullable=False)  # PLC, HMI, SCADA, etc.
+    device_type = Column(_pg_enum(DeviceType, 'device_type_enum'), nullable=False)
     ip_address = Column(INET, nullable=False, index=True)
     mac_address = Column(String(17), nullable=True, index=True)
     manufacturer = Column(String(100), nullable=True)
@@ -170,10 +244,10 @@ class Device(Base):
     firmware_version = Column(String(50), nullable=True)
     location = Column(String(200), nullable=True)
     description = Column(Text, nullable=True)
-    status = Column(String(20), default=DeviceStatus.OFFLINE, nullable=False)
+    status = Column(_pg_enum(DeviceStatus, 'device_status_enum'), default=DeviceStatus.OFFLINE, nullable=False)
     last_seen = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Configuration and metadata
     configuration = Column(JSONB, nullable=True)
@@ -188,6 +262,10 @@ class Device(Base):
     __table_args__ = (
         Index('idx_device_ip_status', 'ip_address', 'status'),
         Index('idx_device_type_status', 'device_type', 'status'),
+        # Index-only scans for get_devices_by_status
+        Index('idx_device_status_covering', 'status',
+              postgresql_include=['name', 'ip_address', 'device_type', 'last_seen']),
+        _gin_index('idx_device_configuration_gin', 'configuration'),
     )
     
     def __repr__(self):
@@ -198,13 +276,13 @@ class NetworkPacket(Base):
     """Network packet model"""
     __tablename__ = "network_packets"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     source_device_id = Column(UUID(as_uuid=True), ForeignKey('devices.id'), nullable=True)
     
     # Packet metadata
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
     packet_size = Column(Integer, nullable=False)
-    protocol = Column(String(20), nullable=False, index=True)
+    protocol = Column(PROTOCOL_TYPE_ENUM, nullable=False, index=True)
     
     # Network layer information
     source_ip = Column(INET, nullable=True, index=True)
@@ -225,7 +303,7 @@ class NetworkPacket(Base):
     
     # Industrial protocol specific
     is_industrial_protocol = Column(Boolean, default=False, nullable=False)
-    industrial_protocol_type = Column(String(20), nullable=True)
+    industrial_protocol_type = Column(PROTOCOL_TYPE_ENUM, nullable=True)
     function_code = Column(Integer, nullable=True)
     
     # ML analysis results
@@ -235,7 +313,7 @@ class NetworkPacket(Base):
     ml_predictions = Column(JSONB, nullable=True)
     
     # Raw packet data (optional, for detailed analysis)
-    raw_packet_hex = Column(Text, nullable=True)
+    raw_packet_bytes = Column(LargeBinary, nullable=True)
     
     # Relationships
     source_device = relationship("Device", back_populates="network_packets")
@@ -247,6 +325,7 @@ class NetworkPacket(Base):
         Index('idx_packet_src_dst_ip', 'source_ip', 'destination_ip'),
         Index('idx_packet_threat_score', 'threat_score'),
         Index('idx_packet_industrial', 'is_industrial_protocol', 'industrial_protocol_type'),
+        _gin_index('idx_packet_ml_predictions_gin', 'ml_predictions'),
     )
     
     def __repr__(self):
@@ -256,7 +335,9 @@ class ThreatAlert(Base):
     """Threat alert model"""
     __tablename__ = "threat_alerts"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # detected_at is part of the key because PostgreSQL requires the
+    # partition column in every unique constraint of a partitioned table
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     related_packet_id = Column(UUID(as_uuid=True), ForeignKey('network_packets.id'), nullable=True)
     affected_device_id = Column(UUID(as_uuid=True), ForeignKey('devices.id'), nullable=True)
     assigned_user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True)
@@ -265,8 +346,8 @@ class ThreatAlert(Base):
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=False)
     threat_type = Column(String(50), nullable=False, index=True)
-    severity = Column(String(20), default=ThreatSeverity.MEDIUM, nullable=False, index=True)
-    status = Column(String(20), default=ThreatStatus.OPEN, nullable=False, index=True)
+    severity = Column(_pg_enum(ThreatSeverity, 'threat_severity_enum'), default=ThreatSeverity.MEDIUM, nullable=False, index=True)
+    status = Column(_pg_enum(ThreatStatus, 'threat_status_enum'), default=ThreatStatus.OPEN, nullable=False, index=True)
     
     # Threat details
     threat_score = Column(Float, nullable=False, index=True)
@@ -276,7 +357,7 @@ class ThreatAlert(Base):
     protocol = Column(String(20), nullable=True)
     
     # Timestamps
-    detected_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    detected_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)
     acknowledged_at = Column(DateTime(timezone=True), nullable=True)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     
@@ -298,7 +379,15 @@ class ThreatAlert(Base):
     __table_args__ = (
         Index('idx_alert_severity_status', 'severity', 'status'),
         Index('idx_alert_detected_type', 'detected_at', 'threat_type'),
+        # Index-only scans for get_active_threats (status IN ..., newest first)
+        Index('idx_alert_status_detected_covering', 'status', text('detected_at DESC'),
+              postgresql_include=['severity', 'threat_type', 'threat_score',
+                                  'title', 'assigned_user_id']),
         Index('idx_alert_src_ip', 'source_ip'),
+        _gin_index('idx_alert_evidence_gin', 'evidence'),
+        _gin_index('idx_alert_mitre_tactics_gin', 'mitre_tactics'),
+        _gin_index('idx_alert_mitre_techniques_gin', 'mitre_techniques'),
+        {'postgresql_partition_by': 'RANGE (detected_at)'},
     )
     
     def __repr__(self):
@@ -308,14 +397,14 @@ class DeviceMetric(Base):
     """Device performance and health metrics"""
     __tablename__ = "device_metrics"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     device_id = Column(UUID(as_uuid=True), ForeignKey('devices.id'), nullable=False)
     
     # Metric information
     metric_name = Column(String(100), nullable=False)
     metric_value = Column(Float, nullable=False)
     metric_unit = Column(String(20), nullable=True)
-    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
     # Metric metadata
     tags = Column(JSONB, nullable=True)  # Additional tags for filtering
@@ -336,12 +425,12 @@ class NetworkScan(Base):
     """Network scan results"""
     __tablename__ = "network_scans"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     
     # Scan information
     scan_type = Column(String(50), nullable=False)  # port_scan, device_discovery, vulnerability_scan
     target_range = Column(String(100), nullable=False)  # IP range or specific target
-    started_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     duration = Column(Float, nullable=True)  # Duration in seconds
     
@@ -371,14 +460,15 @@ class AuditLog(Base):
     """Audit log for system activities"""
     __tablename__ = "audit_logs"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # timestamp is part of the key, see ThreatAlert.id
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True)
     
     # Activity information
     action = Column(String(100), nullable=False, index=True)
     resource_type = Column(String(50), nullable=True)
     resource_id = Column(String(100), nullable=True)
-    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)
     
     # Request details
     ip_address = Column(INET, nullable=True)
@@ -401,6 +491,10 @@ class AuditLog(Base):
         Index('idx_audit_action_timestamp', 'action', 'timestamp'),
         Index('idx_audit_user_timestamp', 'user_id', 'timestamp'),
         Index('idx_audit_resource', 'resource_type', 'resource_id'),
+        _gin_index('idx_audit_details_gin', 'details'),
+        _gin_index('idx_audit_old_values_gin', 'old_values'),
+        _gin_index('idx_audit_new_values_gin', 'new_values'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
     )
     
     def __repr__(self):
@@ -410,7 +504,7 @@ class SystemConfiguration(Base):
     """System configuration settings"""
     __tablename__ = "system_configurations"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     
     # Configuration details
     key = Column(String(100), unique=True, nullable=False, index=True)
@@ -420,8 +514,13 @@ class SystemConfiguration(Base):
     
     # Metadata
     is_sensitive = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Indexes
+    __table_args__ = (
+        _gin_index('idx_sysconfig_value_gin', 'value'),
+    )
     
     def __repr__(self):
         return f"<SystemConfiguration(key='{self.key}', category='{self.category}')>"
@@ -430,7 +529,7 @@ class MLModel(Base):
     """Machine learning model metadata"""
     __tablename__ = "ml_models"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_new_uuid())
     
     # Model information
     name = Column(String(100), nullable=False, unique=True)
@@ -455,8 +554,8 @@ class MLModel(Base):
     
     # Status
     is_active = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Indexes
     __table_args__ = (
@@ -467,6 +566,205 @@ class MLModel(Base):
     def __repr__(self):
         return f"<MLModel(name='{self.name}', type='{self.model_type}', version='{self.version}')>"
 
+# Threat dashboard aggregates (PostgreSQL only). The unique index is what
+# allows REFRESH MATERIALIZED VIEW CONCURRENTLY, so reads never block.
+event.listen(Base.metadata, "after_create", DDL("""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS mv_threat_summary AS
+    SELECT severity, status, threat_type,
+           date_trunc('hour', detected_at) AS bucket,
+           count(*) AS n,
+           avg(threat_score) AS avg_score
+    FROM threat_alerts
+    GROUP BY 1, 2, 3, 4
+    WITH DATA
+""").execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "after_create", DDL("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_threat_summary_key
+    ON mv_threat_summary (severity, status, threat_type, bucket)
+""").execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "before_drop", DDL(
+    "DROP MATERIALIZED VIEW IF EXISTS mv_threat_summary"
+).execute_if(dialect="postgresql"))
+
+# Monthly range partitions (PostgreSQL only), keyed by table name. Rows that
+# fall outside every monthly partition land in <table>_default, so inserts
+# never fail; partition_statements() must run ahead of each new month (the
+# database maintenance loop does this), since a month cannot be attached
+# once the default partition holds rows for it.
+PARTITIONED_TABLES = {
+    "threat_alerts": "detected_at",
+    "audit_logs": "timestamp",
+}
+PARTITION_MONTHS_AHEAD = 2
+
+
+def _month_start(value: datetime, offset: int = 0) -> datetime:
+    """First instant of the month `offset` months after value, in UTC"""
+    month = value.month - 1 + offset
+    return datetime(value.year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _partition_ddl(table: str, start: datetime) -> str:
+    end = _month_start(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+# Tables created before partitioning was introduced stay plain tables, so
+# partition upkeep only targets the ones that really are partitioned
+PARTITIONED_PARENTS_SQL = text("""
+    SELECT c.relname
+    FROM pg_partitioned_table pt
+    JOIN pg_class c ON c.oid = pt.partrelid
+    WHERE c.relname = ANY(:tables)
+""")
+
+PARTITION_CHILDREN_SQL = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname = ANY(:tables)
+""")
+
+
+def partition_statements(tables: List[str],
+                         months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """DDL creating the monthly partitions of tables up to months_ahead"""
+    now = datetime.now(timezone.utc)
+    return [
+        _partition_ddl(table, _month_start(now, offset))
+        for table in tables
+        for offset in range(months_ahead + 1)
+    ]
+
+
+def expired_partitions(names: List[str], cutoff: datetime) -> List[str]:
+    """Monthly partitions among names that end on or before cutoff's month"""
+    limit = _month_start(cutoff)
+    expired = []
+    for name in names:
+        suffix = name.rsplit("_", 2)[-2:]
+        if not all(part.isdigit() for part in suffix):
+            continue  # the default partition
+        start = datetime(int(suffix[0]), int(suffix[1]), 1, tzinfo=timezone.utc)
+        if _month_start(start, 1) <= limit:
+            expired.append(name)
+    return expired
+
+
+def _create_partitions(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {target.name}_default "
+        f"PARTITION OF {target.name} DEFAULT"
+    ))
+    now = datetime.now(timezone.utc)
+    for offset in range(PARTITION_MONTHS_AHEAD + 1):
+        connection.execute(text(_partition_ddl(target.name, _month_start(now, offset))))
+
+
+for _table_name in PARTITIONED_TABLES:
+    event.listen(Base.metadata.tables[_table_name], "after_create", _create_partitions)
+
+_THREAT_SUMMARY_SQL = text("""
+    SELECT severity, status, threat_type, bucket, n, avg_score
+    FROM mv_threat_summary
+    WHERE bucket >= :since
+    ORDER BY bucket DESC
+""")
+
+# All-time and last-window counts per (severity, status, type); the window
+# is hour-granular since it filters on the view's buckets
+THREAT_TOTALS_SQL = text("""
+    SELECT severity, status, threat_type, sum(n)::bigint AS n,
+           coalesce(sum(n) FILTER (WHERE bucket >= :recent), 0)::bigint AS recent
+    FROM mv_threat_summary
+    GROUP BY severity, status, threat_type
+""")
+
+# Same shape from the live table, for backends without the view
+LIVE_THREAT_TOTALS_SQL = text("""
+    SELECT severity, status, threat_type, count(*) AS n,
+           sum(CASE WHEN detected_at >= :recent THEN 1 ELSE 0 END) AS recent
+    FROM threat_alerts
+    GROUP BY severity, status, threat_type
+""")
+
+# Materialized views refreshed by the database maintenance loop
+MATERIALIZED_VIEWS = ["mv_threat_summary", "mv_device_metric_hourly"]
+
+# Hourly device metric rollup (PostgreSQL only), refreshed the same way as
+# mv_threat_summary. The sum is kept next to the average so that wider
+# windows can be combined exactly from hourly rows.
+event.listen(Base.metadata, "after_create", DDL("""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS mv_device_metric_hourly AS
+    SELECT device_id, metric_name,
+           date_trunc('hour', timestamp) AS bucket,
+           min(metric_value) AS min_value,
+           max(metric_value) AS max_value,
+           avg(metric_value) AS avg_value,
+           sum(metric_value) AS sum_value,
+           count(*) AS n
+    FROM device_metrics
+    GROUP BY 1, 2, 3
+    WITH DATA
+""").execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "after_create", DDL("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_device_metric_hourly_key
+    ON mv_device_metric_hourly (device_id, metric_name, bucket)
+""").execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "before_drop", DDL(
+    "DROP MATERIALIZED VIEW IF EXISTS mv_device_metric_hourly"
+).execute_if(dialect="postgresql"))
+
+
+def compute_device_metric_stats_sql(per_bucket: bool = False, from_rollup: bool = True):
+    """
+    Min/max/avg/count of one device's metrics since :since, computed in SQL
+    from mv_device_metric_hourly
+    
+    Binds :device_id and :since. With per_bucket the hourly rows are
+    returned as-is (for charts); otherwise they are folded into a single
+    row per metric. from_rollup=False aggregates device_metrics directly,
+    for backends without the view; it has no hourly buckets.
+    """
+    if not from_rollup:
+        if per_bucket:
+            raise ValueError("Hourly buckets require the mv_device_metric_hourly rollup")
+        return text("""
+            SELECT metric_name,
+                   min(metric_value) AS min_value,
+                   max(metric_value) AS max_value,
+                   avg(metric_value) AS avg_value,
+                   count(*) AS n
+            FROM device_metrics
+            WHERE device_id = :device_id AND timestamp >= :since
+            GROUP BY metric_name
+            ORDER BY metric_name
+        """)
+    if per_bucket:
+        return text("""
+            SELECT metric_name, bucket, min_value, max_value, avg_value, n
+            FROM mv_device_metric_hourly
+            WHERE device_id = :device_id AND bucket >= :since
+            ORDER BY metric_name, bucket
+        """)
+    return text("""
+        SELECT metric_name,
+               min(min_value) AS min_value,
+               max(max_value) AS max_value,
+               sum(sum_value) / sum(n) AS avg_value,
+               sum(n)::bigint AS n
+        FROM mv_device_metric_hourly
+        WHERE device_id = :device_id AND bucket >= :since
+        GROUP BY metric_name
+        ORDER BY metric_name
+    """)
+
 # Database utility functions
 def create_tables(engine):
     """Create all database tables"""
@@ -480,6 +778,21 @@ def get_table_names():
     """Get list of all table names"""
     return [table.name for table in Base.metadata.tables.values()]
 
+# Batches larger than this go through COPY instead of INSERT
+COPY_THRESHOLD = 100
+
+
+def _copy_value(value):
+    """Render one value for a CSV COPY row; None becomes an empty (NULL) field"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()  # bytea hex input format
+    return value
+
+
 # Database session utilities
 class DatabaseManager:
     """Database manager for common operations"""
@@ -497,7 +810,6 @@ class DatabaseManager:
         )
         self.session.add(user)
         self.session.commit()
-        self.session.refresh(user)
         return user
     
     async def create_device(self, name: str, device_type: str, ip_address: str, **kwargs) -> Device:
@@ -510,7 +822,6 @@ class DatabaseManager:
         )
         self.session.add(device)
         self.session.commit()
-        self.session.refresh(device)
         return device
     
     async def create_threat_alert(self, title: str, description: str, threat_type: str, 
@@ -525,94 +836,133 @@ class DatabaseManager:
         )
         self.session.add(alert)
         self.session.commit()
-        self.session.refresh(alert)
         return alert
     
+    async def bulk_create(self, objs: List[Any]) -> List[Any]:
+        """Add several ORM objects in one transaction with a single commit"""
+        self.session.add_all(objs)
+        self.session.commit()
+        return objs
+    
+    async def bulk_insert_packets(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many network packets at once
+        
+        On PostgreSQL with psycopg2, batches above COPY_THRESHOLD are streamed
+        through COPY ... FROM STDIN; smaller batches (and other backends) use a
+        single executemany INSERT. Client-side column defaults are filled in
+        here, since COPY bypasses the ORM; server-default columns the rows do
+        not set are left out of the column list so PostgreSQL fills them.
+        """
+        if not rows:
+            return 0
+        
+        columns = [
+            column for column in NetworkPacket.__table__.columns
+            if column.server_default is None or column.name in rows[0]
+        ]
+        connection = self.session.connection()
+        if len(rows) <= COPY_THRESHOLD or connection.dialect.driver != "psycopg2":
+            self.session.execute(insert(NetworkPacket), rows)
+            self.session.commit()
+            return len(rows)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter="\t", quoting=csv.QUOTE_MINIMAL)
+        for row in rows:
+            values = []
+            for column in columns:
+                value = row.get(column.name)
+                if value is None and column.default is not None:
+                    default = column.default
+                    value = default.arg(None) if default.is_callable else default.arg
+                values.append(_copy_value(value))
+            writer.writerow(values)
+        buffer.seek(0)
+        
+        column_list = ", ".join(column.name for column in columns)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {NetworkPacket.__tablename__} ({column_list}) "
+                f"FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t')",
+                buffer
+            )
+        finally:
+            cursor.close()
+        self.session.commit()
+        return len(rows)
+    
+    async def bulk_log_audit_events(self, events: List[Dict[str, Any]]) -> int:
+        """Log many audit events with one multi-row INSERT and one commit"""
+        if not events:
+            return 0
+        self.session.execute(insert(AuditLog), events)
+        self.session.commit()
+        return len(events)
+    
+    async def bulk_insert_metrics(self, metrics: List[Dict[str, Any]]) -> int:
+        """Insert many device metrics with one multi-row INSERT and one commit"""
+        if not metrics:
+            return 0
+        self.session.execute(insert(DeviceMetric), metrics)
+        self.session.commit()
+        return len(metrics)
+    
     async def get_active_threats(self, limit: int = 100) -> List[ThreatAlert]:
         """Get active threat alerts"""
-        return self.session.query(ThreatAlert).filter(
+        # Many-to-one targets are joined into the main query; the packet is
+        # loaded with one extra IN query, so the total is fixed at two
+        # queries whatever the limit
+        return self.session.query(ThreatAlert).options(
+            joinedload(ThreatAlert.affected_device),
+            joinedload(ThreatAlert.assigned_user),
+            selectinload(ThreatAlert.related_packet)
+        ).filter(
             ThreatAlert.status.in_([ThreatStatus.OPEN, ThreatStatus.INVESTIGATING])
         ).order_by(ThreatAlert.detected_at.desc()).limit(limit).all()
     
-    async def get_devices_by_status(self, status: DeviceStatus) -> List[Device]:
-        """Get devices by status"""
-        return self.session.query(Device).filter(Device.status == status).all()
+    async def get_threat_summary(self, since: datetime) -> List[Any]:
+        """Hourly threat counts by severity/status/type from mv_threat_summary"""
+        return self.session.execute(_THREAT_SUMMARY_SQL, {"since": since}).all()
     
-    async def log_audit_event(self, action: str, user_id: Optional[str] = None, **kwargs):
-        """Log an audit event"""
-        audit_log = AuditLog(
-            action=action,
-            user_id=user_id,
-            **kwargs
-        )
-        self.session.add(audit_log)
+    async def refresh_threat_summary(self):
+        """Refresh mv_threat_summary without blocking readers; run on a schedule"""
+        self.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_threat_summary"))
         self.session.commit()
-        return audit_log
-
-
-def create_tables(engine):
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
-
-def drop_tables(engine):
-    """Drop all database tables"""
-    Base.metadata.drop_all(bind=engine)
-
-def get_table_names():
-    """Get list of all table names"""
-    return [table.name for table in Base.metadata.tables.values()]
-
-# Database session utilities
-class DatabaseManager:
-    """Database manager for common operations"""
     
-    def __init__(self, session: Session):
-        self.session = session
-    
-    async def create_user(self, username: str, email: str, hashed_password: str, **kwargs) -> User:
-        """Create a new user"""
-        user = User(
-            username=username,
-            email=email,
-            hashed_password=hashed_password,
-            **kwargs
-        )
-        self.session.add(user)
+    async def get_device_metric_stats(self, device_id, since: datetime,
+                                      per_bucket: bool = False) -> List[Any]:
+        """Aggregated metrics for a device from the hourly rollup"""
+        return self.session.execute(
+            compute_device_metric_stats_sql(per_bucket),
+            {"device_id": str(device_id), "since": since}
+        ).all()
+    
+    async def refresh_device_metric_rollup(self):
+        """Refresh mv_device_metric_hourly without blocking readers; run on a schedule"""
+        self.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_device_metric_hourly"))
         self.session.commit()
-        self.session.refresh(user)
-        return user
     
-    async def create_device(self, name: str, device_type: str, ip_address: str, **kwargs) -> Device:
-        """Create a new device"""
-        device = Device(
-            name=name,
-            device_type=device_type,
-            ip_address=ip_address,
-            **kwargs
-        )
-        self.session.add(device)
+    async def ensure_partitions(self, months_ahead: int = PARTITION_MONTHS_AHEAD):
+        """Create monthly partitions up to months_ahead"""
+        tables = self.session.execute(
+            PARTITIONED_PARENTS_SQL, {"tables": list(PARTITIONED_TABLES)}
+        ).scalars().all()
+        for statement in partition_statements(tables, months_ahead):
+            self.session.execute(text(statement))
         self.session.commit()
-        self.session.refresh(device)
-        return device
     
-    async def create_threat_alert(self, device_id: str, threat_type: str, severity: ThreatSeverity, **kwargs) -> ThreatAlert:
-        """Create a new threat alert"""
-        alert = ThreatAlert(
-            device_id=device_id,
-            threat_type=threat_type,
-            severity=severity,
-            **kwargs
-        )
-        self.session.add(alert)
+    async def drop_partitions_before(self, cutoff: datetime) -> List[str]:
+        """Drop whole monthly partitions that end on or before cutoff (retention)"""
+        names = self.session.execute(
+            PARTITION_CHILDREN_SQL, {"tables": list(PARTITIONED_TABLES)}
+        ).scalars().all()
+        dropped = expired_partitions(names, cutoff)
+        for name in dropped:
+            self.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
         self.session.commit()
-        self.session.refresh(alert)
-        return alert
-    
-    async def get_active_threats(self, limit: int = 100) -> List[ThreatAlert]:
-        """Get active threat alerts"""
-        return self.session.query(ThreatAlert).filter(
-            ThreatAlert.status.in_([ThreatStatus.OPEN, ThreatStatus.INVESTIGATING])
-        ).order_by(ThreatAlert.detected_at.desc()).limit(limit).all()
+        return dropped
     
     async def get_devices_by_status(self, status: DeviceStatus) -> List[Device]:
         """Get devices by status"""
@@ -627,4 +977,4 @@ class DatabaseManager:
         )
         self.session.add(audit_log)
         self.session.commit()
-        return audit_log
\ No newline at end of file
+        return audit_log
@@ -2,20 +2,27 @@ from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import time
 import uvicorn
 from loguru import logger
 import sys
 
+try:
+    import orjson  # noqa: F401 - required by ORJSONResponse
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
 from .services.nmap_service import NmapService
 
-from .core.config import settings
-from .database.database import init_database, close_database, check_database_health
+from .core.config import settings, ensure_storage_dirs
+from .database.database import init_database, close_database, check_database_health, database_maintenance_loop
 from .auth.middleware import AuthMiddleware, RateLimitMiddleware, SecurityHeadersMiddleware
 from .middleware.security_middleware import SecurityMiddleware, InputValidationMiddleware, CORS_CONFIG
 from .utils.security import RateLimiter
@@ -24,19 +31,22 @@ from .services.ml_service import MLService
 
 # settings is already imported from core.config
 
-# Configure logging
+# Configure logging. Sinks are enqueued: records are handed to a writer
+# thread, so coroutines never wait on the sink lock or on I/O.
 logger.remove()  # Remove default handler
 logger.add(
     sys.stdout,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level=settings.LOG_LEVEL
+    level=settings.LOG_LEVEL,
+    enqueue=True
 )
 logger.add(
     "logs/app.log",
     rotation="10 MB",
     retention="30 days",
     format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-    level=settings.LOG_LEVEL
+    level=settings.LOG_LEVEL,
+    enqueue=True
 )
 
 
@@ -47,10 +57,16 @@ async def lifespan(app: FastAPI):
     logger.info("Starting ICS Cybersecurity Platform...")
     
     try:
+        # Ensure storage directories exist
+        ensure_storage_dirs(settings)
+        
         # Initialize database
         await init_database()
         logger.info("Database initialized successfully")
         
+        # Partition upkeep runs for the lifetime of the app
+        app.state.db_maintenance_task = asyncio.create_task(database_maintenance_loop())
+        
         # Initialize services
         ml_service = MLService()
         nmap_service = NmapService()
@@ -72,6 +88,12 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down ICS Cybersecurity Platform...")
     
     try:
+        # Stop maintenance before its connections go away
+        if hasattr(app.state, 'db_maintenance_task'):
+            app.state.db_maintenance_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await app.state.db_maintenance_task
+        
         # Cleanup database connections
         await close_database()
         logger.info("Database connections closed")
@@ -87,6 +109,9 @@ async def lifespan(app: FastAPI):
         
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
+    
+    # Flush the enqueued log records
+    await logger.complete()
 
 
 # Create FastAPI application
@@ -97,6 +122,7 @@ app = FastAPI(
     docs_url=None,  # Disable default docs
     redoc_url=None,  # Disable default redoc
     openapi_url="/api/openapi.json" if settings.ENVIRONMENT != "production" else None,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse,
     lifespan=lifespan
 )
 
@@ -235,7 +261,6 @@ async def detailed_health_check():
         health_status["services"]["database"] = db_health.get("database", "unhealthy")
         if settings.ENVIRONMENT != "production":
             health_status["services"]["database_details"] = {
-                "sync_connection": db_health.get("sync_connection"),
                 "async_connection": db_health.get("async_connection"),
                 "url": db_health.get("url"),
             }
@@ -5,6 +5,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 import time
 from typing import Callable
+from ..core.config import settings
 from ..utils.security import SecurityValidator, RateLimiter, SECURITY_HEADERS, generate_csp_header
 import logging
 
@@ -211,11 +212,7 @@ class InputValidationMiddleware(BaseHTTPMiddleware):
 
 # CORS security configuration
 CORS_CONFIG = {
-    "allow_origins": [
-        "http://localhost:3000",
-        "http://localhost:5173",
-        "http://frontend:3000"
-    ],
+    "allow_origins": settings.allowed_origins_set,
     "allow_credentials": True,
     "allow_methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     "allow_headers": [
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Optional, Union
 from loguru import logger
+from pydantic import TypeAdapter
 from ..database.database import get_async_db
 from ..auth import AuthService, get_current_user, get_current_active_user, require_role
 from ..auth.models import (
     UserCreate, UserLogin, UserResponse, LoginResponse, TokenResponse,
     RefreshTokenRequest, ChangePasswordRequest, PasswordResetRequest,
     PasswordResetConfirm, UserUpdate, SessionResponse, PermissionResponse,
-    APIResponse, UserRole
+    APIResponse, UserRole, ROLE_BY_VALUE
 )
 from ..database.models import User
 from ..core.config import settings
@@ -18,6 +19,19 @@ from ..core.config import settings
 security = HTTPBearer()
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Serializers for list responses built with from_orm_trusted
+_USER_LIST = TypeAdapter(List[UserResponse])
+_SESSION_LIST = TypeAdapter(List[SessionResponse])
+
+
+def _json_response(content: Union[str, bytes], status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Wrap JSON already serialized from trusted response models. FastAPI
+    passes a returned Response through as is, so response_model only
+    documents the route and the rows are not dumped and re-validated.
+    """
+    return Response(content=content, status_code=status_code, media_type="application/json")
+
 
 @router.post(
     "/register",
@@ -49,7 +63,10 @@ async def register(
         )
         
         logger.info(f"User registered successfully: {user.email} from IP: {client_ip}")
-        return user
+        return _json_response(
+            UserResponse.from_orm_trusted(user).model_dump_json(),
+            status.HTTP_201_CREATED
+        )
         
     except ValueError as e:
         logger.warning(f"Registration failed for {user_data.email}: {str(e)}")
@@ -228,7 +245,7 @@ async def get_me(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get current user information"""
-    return current_user
+    return _json_response(UserResponse.from_orm_trusted(current_user).model_dump_json())
 
 
 @router.put(
@@ -253,7 +270,7 @@ async def update_me(
         )
         
         logger.info(f"User updated successfully: {current_user.email}")
-        return updated_user
+        return _json_response(UserResponse.from_orm_trusted(updated_user).model_dump_json())
         
     except ValueError as e:
         raise HTTPException(
@@ -416,7 +433,9 @@ async def get_sessions(
             db=db
         )
         
-        return sessions
+        return _json_response(_SESSION_LIST.dump_json(
+            [SessionResponse.from_orm_trusted(session) for session in sessions]
+        ))
         
     except Exception as e:
         logger.error(f"Get sessions error for user {current_user.id}: {str(e)}")
@@ -486,7 +505,7 @@ async def get_permissions(
         
         return PermissionResponse(
             permissions=permissions,
-            role=current_user.role
+            role=ROLE_BY_VALUE.get(current_user.role, current_user.role)
         )
         
     except Exception as e:
@@ -519,7 +538,9 @@ async def get_users(
             db=db
         )
         
-        return users
+        return _json_response(_USER_LIST.dump_json(
+            [UserResponse.from_orm_trusted(user) for user in users]
+        ))
         
     except Exception as e:
         logger.error(f"Get users error: {str(e)}")
@@ -557,7 +578,7 @@ async def update_user(
             )
         
         logger.info(f"User {user_id} updated by admin: {current_user.email}")
-        return updated_user
+        return _json_response(UserResponse.from_orm_trusted(updated_user).model_dump_json())
         
     except HTTPException:
         raise
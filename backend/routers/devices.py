@@ -6,10 +6,13 @@ from datetime import datetime, timedelta
 from loguru import logger
 from pydantic import BaseModel, Field, IPvAnyAddress
 from enum import Enum
+import uuid
 
 from ..database.database import get_async_db
 from ..auth import get_current_active_user, require_permission
-from ..database.models import User, Device, DeviceStatus, DeviceType
+from ..database.models import (
+    User, Device, DeviceStatus, DeviceType, compute_device_metric_stats_sql
+)
 from ..core.config import settings
 router = APIRouter(prefix="/devices", tags=["Device Management"])
 
@@ -156,6 +159,16 @@ class DeviceStats(BaseModel):
         }
 
 
+class DeviceMetricStats(BaseModel):
+    """Aggregated device metric, for the whole window or one hour bucket"""
+    metric_name: str
+    bucket: Optional[datetime] = None
+    min_value: float
+    max_value: float
+    avg_value: float
+    count: int
+
+
 class DeviceCommand(BaseModel):
     """Device command model"""
     command: str = Field(..., description="Command to execute")
@@ -603,6 +616,57 @@ async def send_device_command(
         )
 
 
+@router.get(
+    "/{device_id}/metrics/stats",
+    response_model=List[DeviceMetricStats],
+    summary="Get device metric statistics",
+    description="Min/max/avg/count per metric over a time window"
+)
+async def get_device_metric_stats(
+    device_id: uuid.UUID,
+    hours: int = Query(24, ge=1, le=24 * 90, description="Window size in hours"),
+    per_bucket: bool = Query(False, description="Return one row per metric and hour"),
+    current_user: User = Depends(require_permission("read:devices")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get aggregated device metrics"""
+    # PostgreSQL serves these from the hourly rollup view, refreshed by the
+    # database maintenance loop; other backends aggregate the raw metrics
+    from_rollup = db.get_bind().dialect.name == "postgresql"
+    if per_bucket and not from_rollup:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Hourly buckets are not available on this database"
+        )
+    
+    try:
+        result = await db.execute(
+            compute_device_metric_stats_sql(per_bucket, from_rollup),
+            {
+                "device_id": str(device_id),
+                "since": datetime.utcnow() - timedelta(hours=hours)
+            }
+        )
+        return [
+            DeviceMetricStats(
+                metric_name=row.metric_name,
+                bucket=row.bucket if per_bucket else None,
+                min_value=row.min_value,
+                max_value=row.max_value,
+                avg_value=row.avg_value,
+                count=row.n
+            )
+            for row in result
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error retrieving metric stats for device {device_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve device metric statistics"
+        )
+
+
 @router.post(
     "/{device_id}/ping",
     response_model=Dict[str, Any],
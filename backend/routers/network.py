@@ -15,7 +15,7 @@ import random
 
 from ..database.database import get_async_db
 from ..auth import get_current_active_user, require_permission
-from ..database.models import User, Device, NetworkPacket, ThreatAlert, NetworkScan
+from ..database.models import User, Device, NetworkPacket, ThreatAlert, NetworkScan, ProtocolType
 from ..core.config import settings
 from ..services.nmap_service import NmapService
 
@@ -358,7 +358,7 @@ async def get_network_stats(
 )
 async def get_traffic_patterns(
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of patterns to return"),
-    protocol: Optional[str] = Query(None, description="Filter by protocol"),
+    protocol: Optional[ProtocolType] = Query(None, description="Filter by protocol"),
     source_ip: Optional[str] = Query(None, description="Filter by source IP"),
     destination_ip: Optional[str] = Query(None, description="Filter by destination IP"),
     time_range: int = Query(3600, ge=60, le=86400, description="Time range in seconds"),
@@ -6,10 +6,13 @@ from datetime import datetime, timedelta
 from loguru import logger
 from pydantic import BaseModel, Field, IPvAnyAddress
 from enum import Enum
+from collections import defaultdict
 
 from ..database.database import get_async_db
 from ..auth import get_current_active_user, require_permission
 from ..database.models import User, ThreatAlert, ThreatSeverity, Device
+from ..database.models import ThreatStatus as AlertStatus
+from ..database.models import THREAT_TOTALS_SQL, LIVE_THREAT_TOTALS_SQL
 from ..core.config import settings
 from ..services.ml_service import MLService
 from prometheus_client import Counter, Histogram
@@ -276,7 +279,7 @@ async def get_threats(
             conditions.append(ThreatAlert.severity == severity)
         
         if status:
-            conditions.append(ThreatAlert.status == status)
+            conditions.append(ThreatAlert.status == AlertStatus[status.name])
         
         if category:
             conditions.append(ThreatAlert.category == category)
@@ -342,75 +345,45 @@ async def get_threat_stats(
 ):
     """Get threat statistics"""
     try:
-        # Total threats
-        total_result = await db.execute(select(func.count(ThreatAlert.id)))
-        total_threats = total_result.scalar()
-        
-        # Open threats
-        open_result = await db.execute(
-            select(func.count(ThreatAlert.id)).where(ThreatAlert.status == "open")
-        )
-        open_threats = open_result.scalar()
-        
-        # Threats by severity
-        critical_result = await db.execute(
-            select(func.count(ThreatAlert.id)).where(ThreatAlert.severity == ThreatSeverity.CRITICAL)
-        )
-        critical_threats = critical_result.scalar()
-        
-        high_result = await db.execute(
-            select(func.count(ThreatAlert.id)).where(ThreatAlert.severity == ThreatSeverity.HIGH)
-        )
-        high_threats = high_result.scalar()
-        
-        medium_result = await db.execute(
-            select(func.count(ThreatAlert.id)).where(ThreatAlert.severity == ThreatSeverity.MEDIUM)
-        )
-        medium_threats = medium_result.scalar()
-        
-        low_result = await db.execute(
-            select(func.count(ThreatAlert.id)).where(ThreatAlert.severity == ThreatSeverity.LOW)
-        )
-        low_threats = low_result.scalar()
-        
-        # Threats by category
-        category_result = await db.execute(
-            select(ThreatAlert.category, func.count(ThreatAlert.id))
-            .group_by(ThreatAlert.category)
-        )
-        threats_by_category = {row[0]: row[1] for row in category_result.fetchall()}
-        
-        # Threats by status
-        status_result = await db.execute(
-            select(ThreatAlert.status, func.count(ThreatAlert.id))
-            .group_by(ThreatAlert.status)
-        )
-        threats_by_status = {row[0]: row[1] for row in status_result.fetchall()}
-        
-        # Recent threats (last 24 hours)
+        # Counts per (severity, status, type) come from mv_threat_summary on
+        # PostgreSQL, refreshed by the database maintenance loop; other
+        # backends aggregate the live table
         recent_cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent_result = await db.execute(
-            select(func.count(ThreatAlert.id)).where(ThreatAlert.created_at >= recent_cutoff)
+        totals_sql = (
+            THREAT_TOTALS_SQL if db.get_bind().dialect.name == "postgresql"
+            else LIVE_THREAT_TOTALS_SQL
         )
-        recent_threats_24h = recent_result.scalar()
+        totals_result = await db.execute(totals_sql, {"recent": recent_cutoff})
+        
+        total_threats = 0
+        recent_threats_24h = 0
+        threats_by_severity: Dict[str, int] = defaultdict(int)
+        threats_by_category: Dict[str, int] = defaultdict(int)
+        threats_by_status: Dict[str, int] = defaultdict(int)
+        for row in totals_result:
+            total_threats += row.n
+            recent_threats_24h += row.recent
+            threats_by_severity[row.severity] += row.n
+            threats_by_category[row.threat_type] += row.n
+            threats_by_status[ThreatStatus[row.status.upper()].value] += row.n
         
         # Average resolution time
         resolution_result = await db.execute(
             select(func.avg(
-                func.extract('epoch', ThreatAlert.resolved_at - ThreatAlert.created_at) / 3600
+                func.extract('epoch', ThreatAlert.resolved_at - ThreatAlert.detected_at) / 3600
             )).where(ThreatAlert.resolved_at.isnot(None))
         )
         avg_resolution_time = resolution_result.scalar() or 0.0
         
         stats = ThreatStats(
             total_threats=total_threats,
-            open_threats=open_threats,
-            critical_threats=critical_threats,
-            high_threats=high_threats,
-            medium_threats=medium_threats,
-            low_threats=low_threats,
-            threats_by_category=threats_by_category,
-            threats_by_status=threats_by_status,
+            open_threats=threats_by_status[ThreatStatus.OPEN.value],
+            critical_threats=threats_by_severity[ThreatSeverity.CRITICAL.value],
+            high_threats=threats_by_severity[ThreatSeverity.HIGH.value],
+            medium_threats=threats_by_severity[ThreatSeverity.MEDIUM.value],
+            low_threats=threats_by_severity[ThreatSeverity.LOW.value],
+            threats_by_category=dict(threats_by_category),
+            threats_by_status=dict(threats_by_status),
             recent_threats_24h=recent_threats_24h,
             avg_resolution_time_hours=round(avg_resolution_time, 2)
         )
@@ -457,7 +430,7 @@ async def create_threat(
             description=threat_data.description,
             severity=threat_data.severity,
             category=threat_data.category.value,
-            status="open",
+            status=AlertStatus.OPEN,
             source_ip=str(threat_data.source_ip) if threat_data.source_ip else None,
             destination_ip=str(threat_data.destination_ip) if threat_data.destination_ip else None,
             device_id=threat_data.device_id,
@@ -562,7 +535,7 @@ async def update_threat(
         update_data = threat_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             if field == "status" and value:
-                setattr(threat, field, value.value)
+                setattr(threat, field, AlertStatus[value.name])
                 # Set resolved timestamp if status is resolved
                 if value == ThreatStatus.RESOLVED:
                     threat.resolved_at = datetime.utcnow()
@@ -759,7 +732,7 @@ async def create_threat_alerts_from_analysis(
                 description=f"Automated threat detection from analysis {analysis_id}",
                 severity=ThreatSeverity.MEDIUM,
                 category="anomaly",
-                status="open",
+                status=AlertStatus.OPEN,
                 device_id=device_id,
                 confidence_score=0.75,
                 risk_score=60,
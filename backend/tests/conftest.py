@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The backend is imported as the "backend" package, as main.py does
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
@@ -0,0 +1,80 @@
+"""Tests for auth cache eviction in AuthService"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.auth.auth_service import auth_service, session_cache, user_cache
+from backend.auth.password_handler import CURRENT_HASH_VERSION, password_handler
+from backend.database.models import Base, User, UserSession
+
+PASSWORD = "Old-Passw0rd!x"
+
+
+async def _with_user(scenario):
+    """Run scenario(db, user, session) against a throwaway SQLite database"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[User.__table__, UserSession.__table__]
+        )
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            now = datetime.utcnow()
+            user = User(
+                id=uuid.uuid4(),
+                username="operator",
+                email="operator@example.com",
+                hashed_password=password_handler.hash_password(PASSWORD),
+                hash_version=CURRENT_HASH_VERSION,
+                created_at=now,
+                updated_at=now,
+            )
+            session = UserSession(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                session_token=uuid.uuid4().hex,
+                expires_at=now + timedelta(hours=1),
+                created_at=now,
+            )
+            db.add_all([user, session])
+            await db.commit()
+
+            user_cache.set(str(user.id), {"id": user.id, "is_active": True})
+            session_cache.set(str(session.id), session.expires_at)
+            try:
+                await scenario(db, user, session)
+            finally:
+                user_cache.pop(str(user.id), None)
+                session_cache.pop(str(session.id), None)
+    finally:
+        await engine.dispose()
+
+
+def test_logout_evicts_user_and_session_entries():
+    async def scenario(db, user, session):
+        assert await auth_service.logout_user(db, str(session.id))
+        assert user_cache.get(str(user.id)) is None
+        assert session_cache.get(str(session.id)) is None
+
+    asyncio.run(_with_user(scenario))
+
+
+def test_password_change_evicts_user_and_session_entries():
+    async def scenario(db, user, session):
+        assert await auth_service.change_password(db, user.id, PASSWORD, "N3w-Passw0rd!xyz")
+        assert user_cache.get(str(user.id)) is None
+        assert session_cache.get(str(session.id)) is None
+
+    asyncio.run(_with_user(scenario))
+
+
+def test_failed_password_change_keeps_entries():
+    async def scenario(db, user, session):
+        assert not await auth_service.change_password(db, user.id, "wrong", "N3w-Passw0rd!xyz")
+        assert user_cache.get(str(user.id)) is not None
+        assert session_cache.get(str(session.id)) is not None
+
+    asyncio.run(_with_user(scenario))
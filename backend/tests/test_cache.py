@@ -0,0 +1,107 @@
+"""Tests for the in-process TTLCache"""
+
+import threading
+
+import pytest
+
+from backend.utils import cache as cache_module
+from backend.utils.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1)
+    clock.now += 29.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_only_shortens(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=300)
+    clock.now += 5
+    assert cache.get("short") is None
+    clock.now += 24
+    assert cache.get("long") == 2
+    clock.now += 1
+    assert cache.get("long") is None
+
+
+@pytest.mark.parametrize("ttl", [0, -1])
+def test_non_positive_ttl_is_not_stored(clock, ttl):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1, ttl=ttl)
+    assert cache.get("a", "missing") == "missing"
+
+    disabled = TTLCache(maxsize=10, ttl=0)
+    disabled.set("a", 1)
+    assert len(disabled) == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_pop_and_clear(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.clear()
+    assert cache.get("b") is None
+
+
+def test_concurrent_access_keeps_size_bound():
+    cache = TTLCache(maxsize=100, ttl=60)
+    errors = []
+    start = threading.Barrier(8)
+
+    def worker(offset):
+        try:
+            start.wait()
+            for i in range(2000):
+                key = (offset + i) % 250
+                cache.set(key, key)
+                value = cache.get(key)
+                assert value is None or value == key
+                if i % 7 == 0:
+                    cache.pop((key + 1) % 250)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 31,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(cache) <= 100
+    assert all(cache.get(key) in (None, key) for key in range(250))
@@ -0,0 +1,101 @@
+"""Tests for the token-context handling in auth dependencies"""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.exc import OperationalError
+
+from backend.auth.auth_service import user_cache
+from backend.auth.dependencies import (
+    TokenContext,
+    _verify_access_token,
+    get_auth_context,
+    get_current_user_session,
+)
+from backend.auth.jwt_handler import jwt_handler
+from backend.database.models import User
+
+
+def _access_token(**claims):
+    data = {"sub": str(uuid.uuid4()), "permissions": ["read:threats"]}
+    data.update(claims)
+    return jwt_handler.create_access_token(data)
+
+
+def test_verified_claims_are_not_modified():
+    token = _access_token()
+    claims = dict(jwt_handler.verify_token(token))
+
+    context = _verify_access_token(token)
+
+    assert isinstance(context, TokenContext)
+    assert context.claims == claims
+    assert jwt_handler.verify_token(token) == claims
+    assert context.user_id == uuid.UUID(claims["sub"])
+    assert context.perms == frozenset(["read:threats"])
+
+
+def test_context_is_reused_for_the_same_token():
+    token = _access_token()
+    assert _verify_access_token(token) is _verify_access_token(token)
+    assert _verify_access_token(token) is not _verify_access_token(_access_token())
+
+
+@pytest.mark.parametrize("sub", ["not-a-uuid", 42])
+def test_invalid_subject_is_rejected(sub):
+    with pytest.raises(HTTPException) as exc_info:
+        _verify_access_token(_access_token(sub=sub))
+    assert exc_info.value.status_code == 401
+
+
+def test_refresh_token_is_rejected():
+    token = jwt_handler.create_refresh_token({"sub": str(uuid.uuid4())})
+    with pytest.raises(HTTPException):
+        _verify_access_token(token)
+
+
+class _FakeSession:
+    """Just enough of AsyncSession for _load_user's cache-miss path"""
+
+    def __init__(self, user):
+        self.user = user
+
+    async def get(self, model, ident):
+        return self.user if ident == self.user.id else None
+
+
+def test_auth_context_takes_perms_from_token_context():
+    user_id = uuid.uuid4()
+    user = User(id=user_id, username="analyst", email="analyst@example.com",
+                hashed_password="x", is_active=True)
+    token = _access_token(sub=str(user_id), permissions=["read:threats", "read:all"])
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    claims = dict(jwt_handler.verify_token(token))
+
+    try:
+        auth = asyncio.run(get_auth_context(credentials, _FakeSession(user)))
+    finally:
+        user_cache.pop(str(user_id), None)
+
+    assert auth.user is user
+    assert auth.perms == frozenset(["read:threats", "read:all"])
+    assert auth.perms is _verify_access_token(token).perms
+    assert auth.payload == claims
+
+
+class _FailingSession:
+    async def execute(self, *args, **kwargs):
+        raise OperationalError("SELECT", {}, Exception("database is down"))
+
+
+def test_malformed_session_id_yields_no_session():
+    session = asyncio.run(get_current_user_session(_FailingSession(), {"session_id": "nope"}))
+    assert session is None
+
+
+def test_session_lookup_does_not_swallow_database_errors():
+    with pytest.raises(OperationalError):
+        asyncio.run(get_current_user_session(_FailingSession(), {"session_id": str(uuid.uuid4())}))
@@ -0,0 +1,164 @@
+"""Tests for the HS256 fast path in JWTHandler"""
+
+import base64
+import json
+import time
+
+import jwt
+import pytest
+from jwt import ExpiredSignatureError, ImmatureSignatureError, InvalidTokenError
+
+from backend.auth.jwt_handler import JWTHandler, _verify_cache, token_fingerprint
+
+
+@pytest.fixture
+def handler():
+    handler = JWTHandler()
+    assert handler.algorithm == "HS256"
+    return handler
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _forge(handler, claims, header=None):
+    """Sign arbitrary claims (any JSON, not just valid ones) with the handler's key"""
+    header_b64 = handler._hs256_header if header is None else _b64(
+        json.dumps(header, separators=(",", ":")).encode()
+    )
+    payload_b64 = _b64(json.dumps(claims, separators=(",", ":")).encode())
+    mac = handler._hs256_mac.copy()
+    mac.update(f"{header_b64}.{payload_b64}".encode())
+    return f"{header_b64}.{payload_b64}.{_b64(mac.digest())}"
+
+
+def _pyjwt(handler, token):
+    return jwt.decode(token, handler._verify_key, algorithms=handler._algorithms)
+
+
+def test_issued_token_round_trips(handler):
+    token = handler.create_access_token({"sub": "user-1"})
+    claims = handler._decode_hs256(token)
+    assert claims is not None
+    assert claims == _pyjwt(handler, token)
+    assert handler.verify_token(token)["sub"] == "user-1"
+
+
+def test_tampered_signature_is_rejected(handler):
+    token = handler.create_access_token({"sub": "user-1"})
+    header, payload, signature = token.split(".")
+    tampered = f"{header}.{payload}.{signature[:-2]}{'AA' if signature[-2:] != 'AA' else 'BB'}"
+    with pytest.raises(InvalidTokenError):
+        handler._decode_hs256(tampered)
+    assert handler.verify_token(tampered) is None
+
+
+def test_tampered_payload_is_rejected(handler):
+    token = handler.create_access_token({"sub": "user-1"})
+    header, _, signature = token.split(".")
+    forged_payload = _b64(json.dumps({"sub": "admin", "exp": int(time.time()) + 60}).encode())
+    with pytest.raises(InvalidTokenError):
+        handler._decode_hs256(f"{header}.{forged_payload}.{signature}")
+
+
+def test_expired_token_is_rejected(handler):
+    token = _forge(handler, {"sub": "user-1", "exp": int(time.time()) - 10})
+    with pytest.raises(ExpiredSignatureError):
+        handler._decode_hs256(token)
+    with pytest.raises(ExpiredSignatureError):
+        _pyjwt(handler, token)
+    assert handler.verify_token(token) is None
+
+
+def test_future_iat_is_rejected(handler):
+    token = _forge(handler, {"sub": "user-1", "iat": int(time.time()) + 3600})
+    with pytest.raises(ImmatureSignatureError):
+        handler._decode_hs256(token)
+    with pytest.raises(ImmatureSignatureError):
+        _pyjwt(handler, token)
+
+
+def test_foreign_header_defers_to_pyjwt(handler):
+    claims = {"sub": "user-1", "exp": int(time.time()) + 60}
+    token = _forge(handler, claims, header={"typ": "JWT", "alg": "HS256", "kid": "other"})
+    assert handler._decode_hs256(token) is None
+    assert handler.verify_token(token) == _pyjwt(handler, token)
+
+    none_alg = _forge(handler, claims, header={"alg": "none", "typ": "JWT"})
+    assert handler._decode_hs256(none_alg) is None
+    assert handler.verify_token(none_alg) is None
+
+
+@pytest.mark.parametrize("claims", [
+    {"sub": "user-1", "exp": "notanint"},
+    {"sub": "user-1", "iat": "notanint"},
+    {"sub": "user-1", "exp": True},
+    {"sub": "user-1", "iat": None},
+    {"sub": "user-1", "exp": [1]},
+])
+def test_non_numeric_exp_or_iat_is_rejected(handler, claims):
+    token = _forge(handler, claims)
+    assert handler._decode_hs256(token) is None
+    # PyJWT raises TypeError rather than InvalidTokenError for null/list
+    with pytest.raises((InvalidTokenError, TypeError)):
+        _pyjwt(handler, token)
+    assert handler.verify_token(token) is None
+
+
+@pytest.mark.parametrize("claims", [
+    {"sub": "user-1"},
+    {"sub": "user-1", "exp": time.time() + 60},
+    {"sub": "user-1", "iat": time.time() - 60},
+    {"sub": "user-1", "exp": str(int(time.time()) + 60)},
+    {"sub": "user-1", "exp": int(time.time()) + 60, "iat": int(time.time())},
+    {"sub": "user-1", "exp": int(time.time()) - 1},
+    {"sub": "user-1", "iat": "notanint"},
+    {"sub": "user-1", "nbf": int(time.time()) + 3600},
+])
+def test_verify_token_matches_pyjwt(handler, claims):
+    token = _forge(handler, claims)
+    try:
+        expected = _pyjwt(handler, token)
+    except InvalidTokenError:
+        expected = None
+    assert handler.verify_token(token) == expected
+    # Second call is served from the verify cache
+    assert handler.verify_token(token) == expected
+
+
+def test_malformed_payload_matches_pyjwt(handler):
+    header = handler._hs256_header
+    payload = _b64(b"not json")
+    mac = handler._hs256_mac.copy()
+    mac.update(f"{header}.{payload}".encode())
+    token = f"{header}.{payload}.{_b64(mac.digest())}"
+    assert handler._decode_hs256(token) is None
+    with pytest.raises(InvalidTokenError):
+        _pyjwt(handler, token)
+    assert handler.verify_token(token) is None
+
+
+def test_cached_payload_is_served_until_exp(handler):
+    exp = int(time.time()) + 60
+    token = _forge(handler, {"sub": "user-1", "exp": exp})
+
+    first = handler.verify_token(token)
+    assert first is not None
+    assert handler.verify_token(token, _time=lambda: exp - 1) is first
+
+
+def test_cached_payload_does_not_outlive_exp(handler):
+    exp = int(time.time()) + 60
+    token = _forge(handler, {"sub": "user-1", "exp": exp})
+    assert handler.verify_token(token) is not None
+
+    # A hit at exp is treated as expired (as PyJWT does) and evicted
+    assert handler.verify_token(token, _time=lambda: exp) is None
+    assert _verify_cache.get(token_fingerprint(token)) is None
+
+
+def test_failures_are_not_cached(handler):
+    token = _forge(handler, {"sub": "user-1", "exp": int(time.time()) - 1})
+    assert handler.verify_token(token) is None
+    assert _verify_cache.get(token_fingerprint(token)) is None
@@ -0,0 +1,67 @@
+"""Tests for auth response models"""
+
+import json
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.auth.models import LoginResponse, SessionResponse, TokenResponse, UserResponse, UserRole
+
+
+def _user_row(**overrides):
+    row = dict(
+        id=uuid.uuid4(),
+        email="analyst@company.com",
+        full_name="John Doe",
+        role="analyst",
+        is_active=True,
+        created_at=datetime(2024, 1, 1),
+        last_login=None,
+    )
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+def test_trusted_user_response_keeps_declared_types():
+    row = _user_row()
+    response = UserResponse.from_orm_trusted(row)
+    assert response.role is UserRole.ANALYST
+    assert response == UserResponse.model_validate(row)
+
+
+def test_trusted_user_response_serializes_like_validated():
+    row = _user_row(last_login=datetime(2024, 1, 2, 12))
+    trusted = json.loads(UserResponse.from_orm_trusted(row).model_dump_json())
+    validated = json.loads(UserResponse.model_validate(row).model_dump_json())
+    assert trusted == validated
+    assert trusted["role"] == "analyst"
+
+
+def test_trusted_session_response_matches_validated():
+    now = datetime(2024, 1, 1, 12)
+    row = SimpleNamespace(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), user_agent="pytest",
+        ip_address="192.168.1.100", created_at=now,
+        expires_at=now + timedelta(days=1), is_active=True,
+    )
+    assert SessionResponse.from_orm_trusted(row) == SessionResponse.model_validate(row)
+
+
+@pytest.mark.skipif(
+    UserResponse.model_config.get("json_schema_extra") is None,
+    reason="schema examples are disabled in production"
+)
+def test_schema_examples_are_not_shared_between_models():
+    user_example = UserResponse.model_config["json_schema_extra"]["example"]
+    login_example = LoginResponse.model_config["json_schema_extra"]["example"]
+    assert user_example == login_example["user"]
+    assert user_example is not login_example["user"]
+
+    user_example["role"] = "admin"
+    try:
+        assert LoginResponse.model_json_schema()["example"]["user"]["role"] == "analyst"
+    finally:
+        user_example["role"] = "analyst"
+    assert TokenResponse.model_json_schema()["example"] == login_example["tokens"]
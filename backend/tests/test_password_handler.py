@@ -0,0 +1,72 @@
+"""Tests for PasswordHandler caches"""
+
+import warnings
+
+import pytest
+from passlib.context import CryptContext
+
+from backend.auth.password_handler import HASH_VERSION_SHA256, PasswordHandler
+
+PASSWORD = "Corr3ct-Horse!"
+
+
+@pytest.fixture(scope="module")
+def handler():
+    return PasswordHandler()
+
+
+@pytest.fixture(scope="module")
+def stored_hash(handler):
+    return handler.hash_password(PASSWORD)
+
+
+def test_needs_update_matches_passlib_for_same_prefix_hashes(handler, stored_hash):
+    # Prime the memo with a valid current hash first
+    assert handler.needs_update(stored_hash) is False
+
+    salt_end = 7 + 22
+    variants = [stored_hash[:salt_end - 1] + c + stored_hash[salt_end:] for c in "./AZaz09"]
+    variants.append(stored_hash[:7] + "x" * 10)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for variant in variants:
+            try:
+                expected = handler.pwd_context.needs_update(variant)
+            except Exception:
+                expected = False
+            assert handler.needs_update(variant) is expected, variant
+
+
+def test_needs_update_is_memoized_per_full_hash(monkeypatch):
+    seen = []
+    passlib_needs_update = CryptContext.needs_update
+
+    def recording_needs_update(self, hash, **kwargs):
+        seen.append(hash)
+        return passlib_needs_update(self, hash, **kwargs)
+
+    monkeypatch.setattr(CryptContext, "needs_update", recording_needs_update)
+    handler = PasswordHandler()
+    first = handler.hash_password(PASSWORD)
+    second = handler.hash_password(PASSWORD)
+    assert first[:7] == second[:7] and first != second
+
+    for _ in range(3):
+        handler.needs_update(first)
+        handler.needs_update(second)
+    assert seen == [first, second]
+
+
+def test_needs_update_flags_weaker_rounds(handler):
+    weak = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("anything")
+    assert handler.needs_update(weak) is True
+    assert handler.needs_update(weak) is True
+
+
+def test_verify_cache_does_not_outlive_password_change(handler, stored_hash):
+    assert handler.verify_password(PASSWORD, stored_hash, HASH_VERSION_SHA256)
+    assert handler.verify_password(PASSWORD, stored_hash, HASH_VERSION_SHA256)
+    assert not handler.verify_password("wrong", stored_hash, HASH_VERSION_SHA256)
+
+    new_hash = handler.hash_password("N3w-Horse!xyz")
+    assert not handler.verify_password(PASSWORD, new_hash, HASH_VERSION_SHA256)
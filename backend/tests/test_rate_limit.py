@@ -0,0 +1,123 @@
+"""Tests for RateLimitMiddleware windowing and Redis fallback"""
+
+import asyncio
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from backend.auth import middleware as middleware_module
+from backend.auth.middleware import RateLimitMiddleware
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(middleware_module, "time", clock)
+    return clock
+
+
+async def _app(scope, receive, send):  # pragma: no cover - never called
+    raise AssertionError("dispatch is called directly")
+
+
+async def _call_next(request):
+    return PlainTextResponse("ok")
+
+
+def _request(client="10.0.0.1"):
+    return Request({
+        "type": "http", "method": "GET", "path": "/api", "headers": [],
+        "client": (client, 12345),
+    })
+
+
+def _status(limiter, client="10.0.0.1"):
+    return asyncio.run(limiter.dispatch(_request(client), _call_next)).status_code
+
+
+def test_local_limit_is_a_sliding_window(clock):
+    limiter = RateLimitMiddleware(_app, requests_per_minute=3)
+    for _ in range(3):
+        assert _status(limiter) == 200
+        clock.now += 10
+    assert _status(limiter) == 429
+    assert _status(limiter, "10.0.0.2") == 200
+
+    # Crossing a minute boundary does not reset the count; only requests
+    # older than 60s drop out
+    clock.now += 30  # first request is now exactly 60s old
+    assert _status(limiter) == 200
+    assert _status(limiter) == 429
+
+
+class _FailingScript:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, keys, args):
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+
+def test_redis_failure_backs_off_and_logs_once(clock, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(
+        middleware_module.logger, "warning",
+        lambda message, *args: warnings.append(message)
+    )
+    script = _FailingScript()
+    limiter = RateLimitMiddleware(_app, requests_per_minute=100)
+    limiter._redis_script = script
+
+    for _ in range(5):
+        assert _status(limiter) == 200
+    assert script.calls == 1
+    assert len(warnings) == 1
+
+    clock.now += middleware_module._REDIS_RETRY_SECONDS
+    assert _status(limiter) == 200
+    assert script.calls == 2
+    assert len(warnings) == 2
+
+
+class _FakeScript:
+    """Records calls and answers like the Lua script"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        return self.result
+
+
+def test_redis_uses_one_key_per_client(clock):
+    script = _FakeScript([1, 0])
+    limiter = RateLimitMiddleware(_app, requests_per_minute=5)
+    limiter._redis_script = script
+
+    assert _status(limiter) == 200
+    clock.now += 120
+    assert _status(limiter) == 200
+    (first_keys, first_args), (second_keys, second_args) = script.calls
+    assert first_keys == second_keys == ["rl:ip_10.0.0.1"]
+    assert first_args[:2] == [60000, 5]
+    assert first_args[2] != second_args[2]
+
+
+def test_redis_rejection_sets_retry_after(clock):
+    limiter = RateLimitMiddleware(_app, requests_per_minute=5)
+    limiter._redis_script = _FakeScript([0, 1500])
+    response = asyncio.run(limiter.dispatch(_request(), _call_next))
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
@@ -7,6 +7,8 @@ from typing import Optional, Union
 from urllib.parse import quote
 import secrets
 import hashlib
+import time
+from collections import deque
 from datetime import datetime, timedelta
 
 
@@ -169,28 +171,27 @@ class RateLimiter:
     def __init__(self, max_requests: int = 100, window_seconds: int = 3600):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = {}
+        self.requests = {}  # identifier -> deque of monotonic timestamps
     
     def is_allowed(self, identifier: str) -> bool:
         """Check if request is allowed for given identifier"""
-        now = datetime.now()
-        window_start = now - timedelta(seconds=self.window_seconds)
-        
-        # Clean old requests
-        if identifier in self.requests:
-            self.requests[identifier] = [
-                req_time for req_time in self.requests[identifier]
-                if req_time > window_start
-            ]
-        else:
-            self.requests[identifier] = []
+        now = time.monotonic()
+        window_start = now - self.window_seconds
+        
+        request_times = self.requests.get(identifier)
+        if request_times is None:
+            request_times = self.requests[identifier] = deque()
+        
+        # Timestamps are appended in order, so expired ones are at the left
+        while request_times and request_times[0] <= window_start:
+            request_times.popleft()
         
         # Check if limit exceeded
-        if len(self.requests[identifier]) >= self.max_requests:
+        if len(request_times) >= self.max_requests:
             return False
         
         # Add current request
-        self.requests[identifier].append(now)
+        request_times.append(now)
         return True
 
 